@@ -0,0 +1,161 @@
+"""
+Day-granularity availability bitmaps for products.
+
+Every product gets a bitset covering ``AVAILABILITY_HORIZON_DAYS`` days from
+``horizon_start``; bit ``n`` is set when the day ``horizon_start + n`` falls
+inside one of the product's unavailable periods. Range and calendar checks then
+become a shift and a mask on an integer instead of one query per date.
+
+Bitmaps are stored by the writers: the ``UnavailablePeriod`` signals and the
+daily ``refresh_availability_indexes`` task. A read that finds none builds
+one in memory and does not save it, so reads never write.
+"""
+
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, DateField, Func, Q, Value
+from django.utils import timezone
+
+
+DEFAULT_HORIZON_DAYS = 400
+
+
+def get_horizon_days():
+    return getattr(settings, "AVAILABILITY_HORIZON_DAYS", DEFAULT_HORIZON_DAYS)
+
+
+def span_mask(offset, length):
+    """Return an integer with ``length`` bits set starting at bit ``offset``."""
+    return ((1 << length) - 1) << offset
+
+
+def check_range(start, end):
+    """Reject ranges whose ``start`` is after ``end``; both are inclusive."""
+    if start > end:
+        raise ValueError(f"Date range starts after it ends: {start} > {end}")
+
+
+def build_bitmap(periods, horizon_start, horizon_days):
+    """
+    Build the busy bitset for ``periods`` clamped to the horizon.
+
+    Args:
+        periods: Iterable of ``(start, end)`` date pairs, both inclusive
+        horizon_start: First day covered by bit 0
+        horizon_days: Number of days in the horizon
+    """
+    horizon_end = horizon_start + timedelta(days=horizon_days - 1)
+    bits = 0
+    for start, end in periods:
+        if end < horizon_start or start > horizon_end:
+            continue
+        start = max(start, horizon_start)
+        end = min(end, horizon_end)
+        bits |= span_mask((start - horizon_start).days, (end - start).days + 1)
+    return bits
+
+
+PERIOD_FIELDS = ("start_date", "end_date")
+
+
+class DateRange(Func):
+    """PostgreSQL inclusive ``daterange(lower, upper, '[]')``."""
+
+    function = "daterange"
+    template = "%(function)s(%(expressions)s, '[]')"
+    output_field = DateField()
+
+
+class RangeOverlaps(Func):
+    arg_joiner = " && "
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+def overlapping_periods_q(start, end, vendor=None):
+    """
+    Q object matching unavailable periods that touch [start, end]. On
+    PostgreSQL the test is written against the same ``daterange`` expression
+    as the GiST index (migration 0011). ``daterange`` reads a NULL bound as
+    unbounded, so periods missing a date are excluded there, as the
+    comparisons on other backends do.
+    """
+    if vendor == "postgresql":
+        return Q(
+            RangeOverlaps(
+                DateRange("start_date", "end_date"),
+                DateRange(
+                    Value(start, output_field=DateField()),
+                    Value(end, output_field=DateField()),
+                ),
+            ),
+            start_date__isnull=False,
+            end_date__isnull=False,
+        )
+    return Q(start_date__lte=end, end_date__gte=start)
+
+
+def build_availability(product, horizon_start=None):
+    """
+    Compute the availability bitmap of ``product`` without storing it.
+
+    Returns an unsaved ``ProductAvailability``.
+    """
+    from .models import ProductAvailability
+
+    horizon_start = horizon_start or timezone.localdate()
+    horizon_days = get_horizon_days()
+    horizon_end = horizon_start + timedelta(days=horizon_days - 1)
+
+    periods = (
+        product.unavailable_periods.filter(
+            overlapping_periods_q(horizon_start, horizon_end)
+        )
+        .order_by()
+        .values_list(*PERIOD_FIELDS)
+    )
+    bits = build_bitmap(periods, horizon_start, horizon_days)
+    return ProductAvailability(
+        product=product,
+        horizon_start=horizon_start,
+        horizon_days=horizon_days,
+        bitmap=ProductAvailability.encode(bits),
+    )
+
+
+def rebuild_availability(product, horizon_start=None):
+    """
+    Recompute and store the availability bitmap of ``product``.
+
+    The product row is locked before the periods are read, so concurrent
+    rebuilds run one after the other and the last one sees every committed
+    period. Returns the saved ``ProductAvailability`` instance.
+    """
+    from .models import ProductAvailability
+
+    with transaction.atomic():
+        list(
+            type(product)
+            .objects.select_for_update()
+            .filter(pk=product.pk)
+            .values_list("pk", flat=True)
+        )
+        built = build_availability(product, horizon_start)
+        availability, _ = ProductAvailability.objects.update_or_create(
+            product=product,
+            defaults={
+                "horizon_start": built.horizon_start,
+                "horizon_days": built.horizon_days,
+                "bitmap": built.bitmap,
+            },
+        )
+    product.availability = availability
+    return availability
+
+
+def month_bounds(year, month):
+    last_day = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, last_day)
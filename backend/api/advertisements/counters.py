@@ -0,0 +1,87 @@
+"""
+Write-buffered product view counts.
+
+``record_view`` adds one to a hash in the shared store (see ``api.kvstore``)
+instead of updating the product row. ``flush_views`` atomically takes the
+whole hash and applies it to ``Product.views_count`` with a few bulk UPDATEs.
+
+With Redis, the ``flush_product_views`` beat task flushes every
+``VIEW_COUNTER_FLUSH_INTERVAL`` seconds, so a crashed web worker loses
+nothing and a crashed flush loses at most one batch. With the process-local
+stand-in each process flushes its own buffer, once the interval has passed
+or ``VIEW_COUNTER_MAX_PENDING`` products are pending. That bounds what a
+crash can lose.
+"""
+
+import threading
+import time
+from uuid import UUID
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from api.kvstore import get_store, is_shared
+
+
+VIEWS_KEY = "advertisements:product_views"
+FLUSH_BATCH_SIZE = 500
+
+_last_local_flush = time.monotonic()
+_local_flush_lock = threading.Lock()
+
+
+def get_flush_interval():
+    return getattr(settings, "VIEW_COUNTER_FLUSH_INTERVAL", 30)
+
+
+def get_max_pending():
+    return getattr(settings, "VIEW_COUNTER_MAX_PENDING", 1000)
+
+
+def record_view(product_id):
+    store = get_store()
+    store.hincrby(VIEWS_KEY, str(product_id), 1)
+    if not is_shared(store):
+        _maybe_flush_local(store)
+
+
+def _maybe_flush_local(store):
+    global _last_local_flush
+    due = time.monotonic() - _last_local_flush >= get_flush_interval()
+    if not due and store.hlen(VIEWS_KEY) < get_max_pending():
+        return
+    if not _local_flush_lock.acquire(blocking=False):
+        return
+    try:
+        _last_local_flush = time.monotonic()
+        flush_views()
+    finally:
+        _local_flush_lock.release()
+
+
+def flush_views():
+    """
+    Apply all buffered views to ``Product.views_count``.
+
+    Returns the number of products updated.
+    """
+    from .models import Product
+
+    with get_store().pipeline(transaction=True) as pipe:
+        pipe.hgetall(VIEWS_KEY)
+        pipe.delete(VIEWS_KEY)
+        buffered, _ = pipe.execute()
+
+    deltas = [(UUID(key.decode()), int(value)) for key, value in buffered.items()]
+    for start in range(0, len(deltas), FLUSH_BATCH_SIZE):
+        batch = deltas[start : start + FLUSH_BATCH_SIZE]
+        increment = Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in batch),
+            default=Value(0),
+        )
+        with transaction.atomic():
+            Product.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                views_count=F("views_count") + increment
+            )
+    return len(deltas)
@@ -0,0 +1,108 @@
+"""
+Facet counts for the browse page.
+
+``ProductFacetCount`` holds one row per (category, product_type, status)
+combination with the number of products in it. The Product signals adjust the
+affected rows in the same transaction as the product write. Any combination of
+facet filters is then answered from that small, bounded table without scanning
+products. ``reconcile_facet_counts`` rebuilds the table from a GROUP BY to
+repair drift caused by bulk queryset writes, which skip signals.
+"""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+
+FACET_FIELDS = ("category", "product_type", "status")
+
+
+def facet_key(product):
+    return tuple(getattr(product, field) for field in FACET_FIELDS)
+
+
+def adjust_facet_count(key, delta, using="default"):
+    from .models import ProductFacetCount
+
+    lookup = dict(zip(FACET_FIELDS, key))
+    rows = ProductFacetCount.objects.using(using).filter(**lookup)
+    if rows.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic(using=using):
+            ProductFacetCount.objects.using(using).create(count=max(delta, 0), **lookup)
+    except IntegrityError:
+        # Another transaction created the row first.
+        rows.update(count=F("count") + delta)
+
+
+def get_facet_counts(category=None, product_type=None, status=None, using="default"):
+    """
+    Return ``{"category": {...}, "product_type": {...}, "status": {...}}``.
+
+    Each facet is counted with the filters on the *other* facets applied, so
+    the UI can show how many results picking another value would give.
+    """
+    from .models import ProductFacetCount
+
+    filters = dict(zip(FACET_FIELDS, (category, product_type, status)))
+    facets = {field: Counter() for field in FACET_FIELDS}
+    for row in ProductFacetCount.objects.using(using).filter(count__gt=0).values(
+        *FACET_FIELDS, "count"
+    ):
+        for field in FACET_FIELDS:
+            if all(
+                value is None or row[other] == value
+                for other, value in filters.items()
+                if other != field
+            ):
+                facets[field][row[field]] += row["count"]
+    return {field: dict(counts) for field, counts in facets.items()}
+
+
+def reconcile_facet_counts(using="default"):
+    """
+    Recompute every facet count from the product table.
+
+    Returns the number of rows whose count had drifted.
+    """
+    from .models import Product, ProductFacetCount
+
+    with transaction.atomic(using=using):
+        # Lock the counters before counting products: a product write that
+        # commits in between would otherwise be in the stored count but not
+        # in the aggregate, and be overwritten with the stale total. Writers
+        # of existing counters now wait for this transaction.
+        stored = {
+            facet_key(row): row
+            for row in ProductFacetCount.objects.using(using).select_for_update()
+        }
+        actual = {
+            tuple(row[field] for field in FACET_FIELDS): row["total"]
+            for row in Product.objects.using(using)
+            .order_by()
+            .values(*FACET_FIELDS)
+            .annotate(total=Count("pk"))
+        }
+
+        drifted = 0
+        for key in actual.keys() | stored.keys():
+            count = actual.get(key, 0)
+            row = stored.get(key)
+            if row is None:
+                try:
+                    with transaction.atomic(using=using):
+                        ProductFacetCount.objects.using(using).create(
+                            count=count, **dict(zip(FACET_FIELDS, key))
+                        )
+                except IntegrityError:
+                    # A product write created the counter after the lock;
+                    # it counts that product itself.
+                    continue
+                drifted += 1
+            elif row.count != count:
+                row.count = count
+                row.save(update_fields=["count"])
+                drifted += 1
+    return drifted
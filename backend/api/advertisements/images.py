@@ -0,0 +1,138 @@
+"""
+Resized derivatives of product images.
+
+Every ``ProductImage`` gets a thumbnail, card and full-size rendition in both
+WebP and JPEG, generated off the request path by the
+``generate_product_image_variants`` Celery task. The generated files are
+recorded on ``ProductImage.variants`` so serializers can build ``srcset``
+attributes without touching storage. Transparency is kept in the WebP
+variants; JPEG has no alpha channel, so those are flattened onto white.
+
+Variant files are removed with their image, and when the image is replaced
+(see ``advertisements.signals``).
+"""
+
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+# Longest edge in pixels for each variant
+VARIANT_SIZES = {
+    "thumbnail": 160,
+    "card": 480,
+    "full": 1600,
+}
+VARIANT_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+# Formats that keep an alpha channel
+ALPHA_FORMATS = {"webp"}
+VARIANT_DIR = "product_images/variants"
+
+
+def variant_path(product_image, name, extension):
+    # Keyed on the source file (named after its content hash), so the
+    # renditions of a replaced image never share paths with the new ones.
+    source = os.path.splitext(os.path.basename(product_image.image.name))[0]
+    return f"{VARIANT_DIR}/{product_image.pk}/{source[:16]}/{name}.{extension}"
+
+
+def _save(storage, path, content):
+    # Overwrite instead of letting the storage pick an alternative name, so
+    # re-runs are idempotent.
+    if storage.exists(path):
+        storage.delete(path)
+    return storage.save(path, ContentFile(content))
+
+
+def variant_files(variants):
+    return [
+        entry[extension]
+        for entry in variants.values()
+        for extension in VARIANT_FORMATS
+        if extension in entry
+    ]
+
+
+def delete_variants(variants, storage=None):
+    """Delete the files listed in a ``ProductImage.variants`` value."""
+    storage = storage or default_storage
+    for path in variant_files(variants):
+        storage.delete(path)
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def flatten(image, background="white"):
+    """Composite an RGBA image onto ``background`` for formats without alpha."""
+    flat = Image.new("RGB", image.size, background)
+    flat.paste(image, mask=image.getchannel("A"))
+    return flat
+
+
+def has_current_variants(product_image):
+    return bool(product_image.variants) and (
+        product_image.variants_source == product_image.image.name
+    )
+
+
+def generate_variants(product_image, force=False, storage=None):
+    """
+    Render and store every variant of ``product_image``.
+
+    Skips the work when variants already exist for the current file unless
+    ``force`` is set. Returns ``True`` when variants were generated.
+    """
+    if not force and has_current_variants(product_image):
+        return False
+
+    storage = storage or default_storage
+    with product_image.image.open("rb") as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if has_alpha(original):
+        original = original.convert("RGBA")
+    elif original.mode not in ("RGB", "L"):
+        original = original.convert("RGB")
+
+    variants = {}
+    for name, size in VARIANT_SIZES.items():
+        rendition = original.copy()
+        # Never upscale; small originals are stored at their own size.
+        rendition.thumbnail((size, size), Image.Resampling.LANCZOS)
+        entry = {"width": rendition.width, "height": rendition.height}
+        for extension, options in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            if rendition.mode == "RGBA" and extension not in ALPHA_FORMATS:
+                flatten(rendition).save(buffer, **options)
+            else:
+                rendition.save(buffer, **options)
+            entry[extension] = _save(
+                storage, variant_path(product_image, name, extension), buffer.getvalue()
+            )
+        variants[name] = entry
+
+    updated = type(product_image).objects.filter(pk=product_image.pk).update(
+        variants=variants, variants_source=product_image.image.name
+    )
+    if not updated:
+        # The image was deleted while its variants were being rendered
+        delete_variants(variants, storage)
+        return False
+    # Renditions at paths no longer used, e.g. of an older source file
+    current = set(variant_files(variants))
+    for path in variant_files(product_image.variants):
+        if path not in current:
+            storage.delete(path)
+    product_image.variants = variants
+    product_image.variants_source = product_image.image.name
+    return True
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from advertisements.images import generate_variants, has_current_variants
+from advertisements.models import ProductImage
+from advertisements.tasks import generate_product_image_variants
+
+
+class Command(BaseCommand):
+    help = "Generate missing resized variants for existing product images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Render in this process instead of queueing Celery tasks.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants that are already up to date.",
+        )
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.order_by("pk")
+        processed = 0
+        last_pk = None
+        while True:
+            batch = images if last_pk is None else images.filter(pk__gt=last_pk)
+            batch = list(batch[: options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for product_image in batch:
+                if not options["force"] and has_current_variants(product_image):
+                    continue
+                if options["sync"]:
+                    try:
+                        generate_variants(product_image, force=options["force"])
+                    except OSError as e:
+                        self.stderr.write(f"{product_image.pk}: {e}")
+                        continue
+                else:
+                    generate_product_image_variants.delay(
+                        str(product_image.pk), force=options["force"]
+                    )
+                processed += 1
+
+        verb = "Generated" if options["sync"] else "Queued"
+        self.stdout.write(self.style.SUCCESS(f"{verb} variants for {processed} images"))
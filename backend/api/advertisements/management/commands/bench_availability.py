@@ -0,0 +1,127 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.utils import timezone
+
+from api.benchmarks import QueryCounter, create_bench_user, rolled_back, timer
+from advertisements.availability import rebuild_availability
+from advertisements.models import Product, UnavailablePeriod
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare 30-day availability checks done with the per-date query loop "
+        "against the availability bitmap. Runs in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--periods-per-product", type=int, default=5)
+        parser.add_argument("--window-days", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        with rolled_back():
+            products = self._create_fixtures(
+                options["products"], options["periods_per_product"]
+            )
+            self._run(products, options["window_days"])
+
+    def _create_fixtures(self, count, periods_per_product):
+        owner = create_bench_user()
+        today = timezone.localdate()
+        products = Product.objects.bulk_create(
+            Product(
+                owner=owner,
+                title=f"Bench product {i}",
+                category="electronics",
+                product_type="laptop",
+                description="Benchmark fixture",
+                location="Dhaka",
+                purchase_year=today,
+                purchase_price=1000,
+                ownership_history="firsthand",
+                status="active",
+            )
+            for i in range(count)
+        )
+
+        periods = []
+        for product in products:
+            for _ in range(periods_per_product):
+                start = today + timedelta(days=random.randint(0, 365))
+                if random.random() < 0.5:
+                    periods.append(
+                        UnavailablePeriod(product=product, single_date=start)
+                    )
+                else:
+                    periods.append(
+                        UnavailablePeriod(
+                            product=product,
+                            is_range=True,
+                            range_start=start,
+                            range_end=start + timedelta(days=random.randint(1, 14)),
+                        )
+                    )
+        UnavailablePeriod.objects.bulk_create(periods, batch_size=5000)
+
+        self.stdout.write(f"Created {len(products)} products, {len(periods)} periods")
+        return products
+
+    def _run(self, products, window_days):
+        start = timezone.localdate() + timedelta(days=30)
+        window = [start + timedelta(days=offset) for offset in range(window_days)]
+        end = window[-1]
+        results = {}
+
+        def per_date_available(product):
+            return all(
+                not product.unavailable_periods.filter(
+                    models.Q(is_range=False, single_date=date)
+                    | models.Q(
+                        is_range=True, range_start__lte=date, range_end__gte=date
+                    )
+                ).exists()
+                for date in window
+            )
+
+        with QueryCounter() as loop_queries:
+            with timer(results, "loop"):
+                loop_free = [per_date_available(product) for product in products]
+
+        with timer(results, "build"):
+            for product in products:
+                rebuild_availability(product)
+
+        with QueryCounter() as bitmap_queries:
+            with timer(results, "bitmap"):
+                loaded = Product.objects.filter(
+                    pk__in=[product.pk for product in products]
+                ).select_related("availability")
+                bitmap_free = {
+                    product.pk: product.is_range_available(start, end)
+                    for product in loaded
+                }
+
+        mismatches = sum(
+            1
+            for product, free in zip(products, loop_free)
+            if bitmap_free[product.pk] != free
+        )
+
+        self.stdout.write(
+            f"Per-date query loop: {results['loop']:.3f}s, "
+            f"{loop_queries.count} queries"
+        )
+        self.stdout.write(f"Bitmap build: {results['build']:.3f}s")
+        self.stdout.write(
+            f"Bitmap lookup: {results['bitmap']:.3f}s, "
+            f"{bitmap_queries.count} queries"
+        )
+        self.stdout.write(
+            f"Speed-up: {results['loop'] / max(results['bitmap'], 1e-9):.1f}x, "
+            f"mismatches: {mismatches}"
+        )
@@ -0,0 +1,118 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from api.benchmarks import QueryCounter, create_bench_user, rolled_back, timer
+from advertisements.availability import overlapping_periods_q
+from advertisements.models import Product, UnavailablePeriod
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the catalog-wide available_between() query with a per-product "
+        "Python loop. Runs in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100000)
+        parser.add_argument("--periods", type=int, default=1000000)
+        parser.add_argument(
+            "--loop-sample",
+            type=int,
+            default=2000,
+            help="Products checked by the Python loop; its time is extrapolated.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        results = {}
+        with rolled_back():
+            with timer(results, "fixtures"):
+                self._create_fixtures(options["products"], options["periods"])
+            self.stdout.write(
+                f"Created {options['products']} products and {options['periods']} "
+                f"periods in {results['fixtures']:.1f}s ({connection.vendor})"
+            )
+            self._run(options["products"], options["loop_sample"])
+
+    def _create_fixtures(self, product_count, period_count):
+        owner = create_bench_user()
+        today = timezone.localdate()
+        products = Product.objects.bulk_create(
+            (
+                Product(
+                    owner=owner,
+                    title=f"Bench product {i}",
+                    category="electronics",
+                    product_type="laptop",
+                    description="Benchmark fixture",
+                    location="Dhaka",
+                    purchase_year=today,
+                    purchase_price=1000,
+                    ownership_history="firsthand",
+                    status="active",
+                )
+                for i in range(product_count)
+            ),
+            batch_size=5000,
+        )
+
+        def periods():
+            for _ in range(period_count):
+                product = random.choice(products)
+                start = today + timedelta(days=random.randint(0, 365))
+                if random.random() < 0.5:
+                    yield UnavailablePeriod(product=product, single_date=start)
+                else:
+                    yield UnavailablePeriod(
+                        product=product,
+                        is_range=True,
+                        range_start=start,
+                        range_end=start + timedelta(days=random.randint(1, 14)),
+                    )
+
+        UnavailablePeriod.objects.bulk_create(periods(), batch_size=5000)
+
+    def _run(self, product_count, loop_sample):
+        start = timezone.localdate() + timedelta(days=60)
+        end = start + timedelta(days=6)
+        results = {}
+
+        with QueryCounter() as query_counter:
+            with timer(results, "query"):
+                available = list(
+                    Product.objects.available_between(start, end).values_list(
+                        "pk", flat=True
+                    )
+                )
+
+        sample = list(
+            Product.objects.order_by("pk").values_list("pk", flat=True)[:loop_sample]
+        )
+        with QueryCounter() as loop_counter:
+            with timer(results, "loop"):
+                looped = [
+                    pk
+                    for pk in sample
+                    if not UnavailablePeriod.objects.filter(
+                        overlapping_periods_q(start, end), product_id=pk
+                    ).exists()
+                ]
+
+        available_set = set(available)
+        mismatches = sum(1 for pk in sample if (pk in available_set) != (pk in looped))
+        loop_estimate = results["loop"] / max(len(sample), 1) * product_count
+
+        self.stdout.write(
+            f"available_between(): {len(available)} products in "
+            f"{results['query']:.3f}s, {query_counter.count} queries"
+        )
+        self.stdout.write(
+            f"Python loop: {len(sample)} products in {results['loop']:.3f}s, "
+            f"{loop_counter.count} queries (~{loop_estimate:.1f}s for the catalog)"
+        )
+        self.stdout.write(f"Mismatches in sample: {mismatches}")
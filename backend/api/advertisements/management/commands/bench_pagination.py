@@ -0,0 +1,87 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.benchmarks import create_bench_user, rolled_back
+from api.pagination import KeysetPagination
+from advertisements.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the latency of fetching a deep page with OFFSET pagination "
+        "and with KeysetPagination. Runs in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=50000)
+        parser.add_argument("--page", type=int, default=1000)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        page, page_size = options["page"], options["page_size"]
+        if options["products"] < page * page_size:
+            self.stderr.write("Not enough products to reach the requested page.")
+            return
+
+        with rolled_back():
+            self._create_fixtures(options["products"])
+            queryset = Product.objects.all()
+            offset = (page - 1) * page_size
+
+            def offset_page():
+                return list(
+                    queryset.order_by("-created_at", "-pk")[offset : offset + page_size]
+                )
+
+            # Cursor pointing at the last row of the previous page, as a client
+            # that scrolled there would hold.
+            paginator = KeysetPagination()
+            paginator.base_url = f"http://localhost/products/?page_size={page_size}"
+            anchor = queryset.order_by("-created_at", "-pk")[offset - 1]
+            url = paginator.encode_cursor(anchor, reverse=False)
+            request = Request(APIRequestFactory().get(url, HTTP_HOST="localhost"))
+
+            def keyset_page():
+                return KeysetPagination().paginate_queryset(queryset, request)
+
+            if [p.pk for p in offset_page()] != [p.pk for p in keyset_page()]:
+                self.stderr.write("Offset and keyset pages differ!")
+
+            for label, fetch in (("OFFSET", offset_page), ("Keyset", keyset_page)):
+                samples = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    fetch()
+                    samples.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"{label} page {page}: median {statistics.median(samples) * 1000:.2f}ms"
+                )
+
+    def _create_fixtures(self, count):
+        owner = create_bench_user()
+        today = timezone.localdate()
+        Product.objects.bulk_create(
+            (
+                Product(
+                    owner=owner,
+                    title=f"Bench product {i}",
+                    category="electronics",
+                    product_type="laptop",
+                    description="Benchmark fixture",
+                    location="Dhaka",
+                    purchase_year=today,
+                    purchase_price=1000,
+                    ownership_history="firsthand",
+                    status="active",
+                )
+                for i in range(count)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"Created {count} products")
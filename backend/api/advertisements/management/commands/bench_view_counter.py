@@ -0,0 +1,85 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.utils import timezone
+
+from api.benchmarks import QueryCounter, create_bench_user, rolled_back, timer
+from api.kvstore import get_store, is_shared
+from advertisements.counters import flush_views
+from advertisements.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare view-count throughput of a per-view UPDATE with the buffered "
+        "counter plus one flush. Runs in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--views", type=int, default=20000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        store = "shared Redis" if is_shared(get_store()) else "process-local store"
+        self.stdout.write(f"Buffering in the {store}")
+
+        with rolled_back():
+            products = self._create_fixtures(options["products"])
+            views = [random.choice(products) for _ in range(options["views"])]
+            flush_views()
+            results = {}
+
+            with QueryCounter() as update_queries:
+                with timer(results, "update"):
+                    for product in views:
+                        # The former Product.increment_views body
+                        product.views_count = models.F("views_count") + 1
+                        product.save(update_fields=["views_count"])
+
+            with QueryCounter() as buffered_queries:
+                with timer(results, "buffered"):
+                    for product in views:
+                        product.increment_views()
+                with timer(results, "flush"):
+                    flush_views()
+
+            expected = 2 * len(views)
+            stored = sum(
+                Product.objects.filter(pk__in=[p.pk for p in products]).values_list(
+                    "views_count", flat=True
+                )
+            )
+
+        count = len(views)
+        buffered_total = results["buffered"] + results["flush"]
+        self.stdout.write(
+            f"Per-view UPDATE: {count / results['update']:.0f} views/s, "
+            f"{update_queries.count} queries"
+        )
+        self.stdout.write(
+            f"Buffered: {count / buffered_total:.0f} views/s including flush "
+            f"({results['flush'] * 1000:.1f}ms), {buffered_queries.count} queries"
+        )
+        self.stdout.write(f"Stored views: {stored} (expected {expected})")
+
+    def _create_fixtures(self, count):
+        owner = create_bench_user()
+        today = timezone.localdate()
+        return Product.objects.bulk_create(
+            Product(
+                owner=owner,
+                title=f"Bench product {i}",
+                category="electronics",
+                product_type="laptop",
+                description="Benchmark fixture",
+                location="Dhaka",
+                purchase_year=today,
+                purchase_price=1000,
+                ownership_history="firsthand",
+                status="active",
+            )
+            for i in range(count)
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from advertisements.models import Product
+from advertisements.search import index_rows
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        batch_size = options["batch_size"]
+        rows = (
+            Product.objects.using(using)
+            .order_by("pk")
+            .values_list("pk", "title", "product_type", "description")
+        )
+
+        indexed = 0
+        last_pk = None
+        while True:
+            batch = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            # One short transaction per batch keeps locks brief.
+            with transaction.atomic(using=using):
+                index_rows(connections[using], batch)
+            indexed += len(batch)
+            last_pk = batch[-1][0]
+            self.stdout.write(f"Indexed {indexed} products", ending="\r")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} products"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 17:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAvailability',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability', serialize=False, to='advertisements.product')),
+                ('horizon_start', models.DateField(help_text='First day covered by the bitmap')),
+                ('horizon_days', models.PositiveSmallIntegerField(help_text='Number of days covered by the bitmap')),
+                ('bitmap', models.BinaryField(help_text='Little-endian busy-day bitset')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product Availability',
+                'verbose_name_plural': 'Product Availabilities',
+            },
+        ),
+    ]
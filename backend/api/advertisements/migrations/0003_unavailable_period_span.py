@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-17 17:29
+
+from django.db import migrations, models
+
+
+def add_period_gist_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX unavail_period_gist_idx "
+        "ON advertisements_unavailableperiod "
+        "USING gist (daterange(start_date, end_date, '[]'))"
+    )
+
+
+def drop_period_gist_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX unavail_period_gist_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0002_product_availability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unavailableperiod',
+            name='end_date',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(is_range=True, then='range_end'), default='single_date'), output_field=models.DateField(null=True)),
+        ),
+        migrations.AddField(
+            model_name='unavailableperiod',
+            name='start_date',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(is_range=True, then='range_start'), default='single_date'), output_field=models.DateField(null=True)),
+        ),
+        migrations.AddIndex(
+            model_name='unavailableperiod',
+            index=models.Index(fields=['product', 'start_date', 'end_date'], name='unavail_product_span_idx'),
+        ),
+        migrations.RunPython(add_period_gist_index, drop_period_gist_index),
+    ]
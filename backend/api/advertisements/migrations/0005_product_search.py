@@ -0,0 +1,87 @@
+from django.db import migrations
+
+
+# The SQL is copied from advertisements.search as it was when this migration
+# was written, so later changes to the search code cannot change history.
+FTS_TABLE = "advertisements_product_fts"
+PG_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(%s, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(%s, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(%s, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE advertisements_product ADD COLUMN search_vector tsvector"
+        )
+        schema_editor.execute(
+            "CREATE INDEX product_search_vector_idx "
+            "ON advertisements_product USING gin (search_vector)"
+        )
+    elif connection.vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "product_id UNINDEXED, title, type_label, description, "
+            "tokenize = 'porter unicode61')"
+        )
+    else:
+        return
+
+    Product = apps.get_model("advertisements", "Product")
+    labels = {
+        value: str(label)
+        for value, label in Product._meta.get_field("product_type").flatchoices
+    }
+    rows = [
+        (pk, title, labels.get(product_type, ""), description)
+        for pk, title, product_type, description in Product.objects.using(
+            connection.alias
+        )
+        .values_list("pk", "title", "product_type", "description")
+        .iterator(chunk_size=1000)
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.executemany(
+                f"UPDATE advertisements_product SET search_vector = {PG_VECTOR_SQL} "
+                "WHERE id = %s",
+                [
+                    (title, label, description, pk)
+                    for pk, title, label, description in rows
+                ],
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (product_id, title, type_label, description) "
+                "VALUES (%s, %s, %s, %s)",
+                [
+                    (pk.hex, title, label, description)
+                    for pk, title, label, description in rows
+                ],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE advertisements_product DROP COLUMN search_vector"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("advertisements", "0004_product_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-17 17:36
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_rating_totals(apps, schema_editor):
+    # The previous running average assumed one rating per rental.
+    Product = apps.get_model("advertisements", "Product")
+    User = apps.get_model("users", "User")
+    using = schema_editor.connection.alias
+
+    owner_totals = defaultdict(lambda: [Decimal("0"), 0])
+    products = Product.objects.using(using).filter(
+        average_rating__isnull=False, rental_count__gt=0
+    )
+    for product in products.iterator():
+        product.rating_count = product.rental_count
+        product.rating_sum = product.average_rating * product.rental_count
+        product.save(update_fields=["rating_sum", "rating_count"])
+        owner_totals[product.owner_id][0] += product.rating_sum
+        owner_totals[product.owner_id][1] += product.rating_count
+
+    for owner_id, (rating_sum, rating_count) in owner_totals.items():
+        User.objects.using(using).filter(pk=owner_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            average_rating=(rating_sum / rating_count).quantize(Decimal("0.01")),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0006_product_facet_count'),
+        ('users', '0003_user_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of ratings'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Sum of all ratings', max_digits=12),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
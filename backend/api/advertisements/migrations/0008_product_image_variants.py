@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0007_product_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized renditions, generated in the background'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='variants_source',
+            field=models.CharField(blank=True, help_text='Image file the variants were generated from', max_length=255),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 17:40
+
+import blobs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0008_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(help_text='Upload product images (max 5MB, formats: jpeg, png, gif)', storage=blobs.storage.get_media_storage, upload_to='product_images/'),
+        ),
+    ]
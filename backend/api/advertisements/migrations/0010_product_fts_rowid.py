@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+FTS_TABLE = "advertisements_product_fts"
+
+
+def fts_rowid(product_id):
+    # Leading 64 bits of the product UUID, stored as 32 hex characters
+    return int.from_bytes(bytes.fromhex(product_id)[:8], "big", signed=True)
+
+
+def key_fts_rows_by_product(apps, schema_editor):
+    """
+    Renumber the SQLite FTS rows so each rowid is derived from its product id
+    and a product's row can be replaced without a table scan.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT product_id, title, type_label, description FROM {FTS_TABLE}"
+        )
+        rows = cursor.fetchall()
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} "
+            "(rowid, product_id, title, type_label, description) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [(fts_rowid(row[0]), *row) for row in rows],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("advertisements", "0009_product_image_blob_storage"),
+    ]
+
+    operations = [
+        # Any rowids work for the code before this migration
+        migrations.RunPython(key_fts_rows_by_product, migrations.RunPython.noop),
+    ]
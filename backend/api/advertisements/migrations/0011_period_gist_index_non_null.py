@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+# daterange() reads a NULL bound as unbounded; such periods are excluded from
+# the overlap query (availability.overlapping_periods_q) and from the index.
+CREATE_INDEX = (
+    "CREATE INDEX unavail_period_gist_idx "
+    "ON advertisements_unavailableperiod "
+    "USING gist (daterange(start_date, end_date, '[]'))"
+)
+DROP_INDEX = "DROP INDEX unavail_period_gist_idx"
+
+
+def index_non_null_periods(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_INDEX)
+    schema_editor.execute(
+        f"{CREATE_INDEX} WHERE start_date IS NOT NULL AND end_date IS NOT NULL"
+    )
+
+
+def index_all_periods(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_INDEX)
+    schema_editor.execute(CREATE_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0010_product_fts_rowid'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_non_null_periods, index_all_periods),
+    ]
@@ -1,20 +1,47 @@
-from django.db import models
+from django.db import connections, models, router, transaction
 from uuid import uuid4
 from .constants import *
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.conf import settings
+from django.core.files.storage import default_storage
+from datetime import timedelta
+from blobs.storage import get_media_storage
+from .counters import record_view
+from .pricing import quote_product
+from .ratings import ingest_ratings
+from .search import search_products
+from .availability import (
+    PERIOD_FIELDS,
+    build_availability,
+    build_bitmap,
+    check_range,
+    month_bounds,
+    overlapping_periods_q,
+    span_mask,
+)
 
 
 class ProductImage(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     image = models.ImageField(
         upload_to="product_images/",
+        storage=get_media_storage,
         help_text=_("Upload product images (max 5MB, formats: jpeg, png, gif)"),
     )
     product = models.ForeignKey(
         "Product", on_delete=models.CASCADE, related_name="images"
     )
+    variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=_("Resized renditions, generated in the background"),
+    )
+    variants_source = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Image file the variants were generated from"),
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -26,6 +53,22 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"Image for {self.product.title}"
 
+    def get_variant_url(self, name, image_format="webp"):
+        """URL of a resized variant, or of the original until it exists."""
+        variant = self.variants.get(name)
+        if not variant or self.variants_source != self.image.name:
+            return self.image.url
+        return default_storage.url(variant[image_format])
+
+    def get_srcset(self, image_format="webp"):
+        """``srcset`` attribute value listing every variant by width."""
+        if self.variants_source != self.image.name:
+            return ""
+        return ", ".join(
+            f"{default_storage.url(variant[image_format])} {variant['width']}w"
+            for variant in sorted(self.variants.values(), key=lambda v: v["width"])
+        )
+
 
 class PricingTier(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
@@ -79,11 +122,36 @@ class UnavailablePeriod(models.Model):
     range_end = models.DateField(
         null=True, blank=True, help_text=_("End date of unavailable period")
     )
+    # Inclusive bounds normalised from single_date / range_*, maintained by the
+    # database so bulk writes stay consistent. On PostgreSQL they also back a
+    # GiST index on daterange(start_date, end_date) (migrations 0003, 0011).
+    start_date = models.GeneratedField(
+        expression=models.Case(
+            models.When(is_range=True, then="range_start"),
+            default="single_date",
+        ),
+        output_field=models.DateField(null=True),
+        db_persist=True,
+    )
+    end_date = models.GeneratedField(
+        expression=models.Case(
+            models.When(is_range=True, then="range_end"),
+            default="single_date",
+        ),
+        output_field=models.DateField(null=True),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-range_start", "-single_date"]
+        indexes = [
+            models.Index(
+                fields=["product", "start_date", "end_date"],
+                name="unavail_product_span_idx",
+            ),
+        ]
         verbose_name = _("Unavailable Period")
         verbose_name_plural = _("Unavailable Periods")
 
@@ -93,6 +161,101 @@ class UnavailablePeriod(models.Model):
         return f"{self.product.title} - Unavailable on {self.single_date}"
 
 
+class ProductAvailability(models.Model):
+    """
+    Busy-day bitmap of a product, rebuilt whenever its unavailable periods
+    change. Bit ``n`` of ``bitmap`` is set when ``horizon_start + n days`` is
+    unavailable.
+    """
+
+    product = models.OneToOneField(
+        "Product",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="availability",
+    )
+    horizon_start = models.DateField(help_text=_("First day covered by the bitmap"))
+    horizon_days = models.PositiveSmallIntegerField(
+        help_text=_("Number of days covered by the bitmap")
+    )
+    bitmap = models.BinaryField(help_text=_("Little-endian busy-day bitset"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Product Availability")
+        verbose_name_plural = _("Product Availabilities")
+
+    def __str__(self):
+        return f"Availability of {self.product_id} from {self.horizon_start}"
+
+    @staticmethod
+    def encode(bits):
+        return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+    @property
+    def bits(self):
+        if not hasattr(self, "_bits"):
+            self._bits = int.from_bytes(bytes(self.bitmap), "little")
+        return self._bits
+
+    @property
+    def horizon_end(self):
+        return self.horizon_start + timedelta(days=self.horizon_days - 1)
+
+    def covers(self, start, end):
+        return self.horizon_start <= start and end <= self.horizon_end
+
+    def busy_mask(self, start, end):
+        """Busy bits for [start, end], shifted so that bit 0 is ``start``."""
+        check_range(start, end)
+        offset = (start - self.horizon_start).days
+        length = (end - start).days + 1
+        return (self.bits >> offset) & span_mask(0, length)
+
+    def is_free(self, start, end):
+        return self.busy_mask(start, end) == 0
+
+
+class ProductFacetCount(models.Model):
+    category = models.CharField(max_length=255, choices=CATEGORY_CHOICES)
+    product_type = models.CharField(max_length=255, choices=PRODUCT_TYPE_CHOICES)
+    status = models.CharField(max_length=255, choices=STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Product Facet Count")
+        verbose_name_plural = _("Product Facet Counts")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "product_type", "status"],
+                name="unique_product_facet",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.category}/{self.product_type}/{self.status}: {self.count}"
+
+
+class ProductQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status="active")
+
+    def available_between(self, start, end):
+        """
+        Products with no unavailable period overlapping [start, end], as a
+        single anti-join query.
+        """
+        vendor = connections[self.db].vendor
+        blocking = UnavailablePeriod.objects.filter(
+            overlapping_periods_q(start, end, vendor), product=models.OuterRef("pk")
+        )
+        return self.filter(~models.Exists(blocking))
+
+    def search(self, query):
+        """Full-text search ranked by ``search_rank``; see ``search.py``."""
+        return search_products(self, query)
+
+
 class Product(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="products")
@@ -142,12 +305,25 @@ class Product(models.Model):
         blank=True,
         help_text=_("Average rating (0-5)"),
     )
+    rating_sum = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text=_("Sum of all ratings"),
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0, help_text=_("Number of ratings")
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
+            # Seek index for api.pagination.KeysetPagination
+            models.Index(fields=["-created_at", "-id"], name="product_created_id_idx"),
             models.Index(fields=["status"]),
             models.Index(fields=["category"]),
             models.Index(fields=["product_type"]),
@@ -158,31 +334,75 @@ class Product(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Keep the signal-maintained facet counts and search index in the same
+        # transaction as the product row.
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     def increment_views(self):
-        self.views_count = models.F("views_count") + 1
-        self.save(update_fields=["views_count"])
+        # Buffered and written in bulk by counters.flush_views
+        record_view(self.pk)
 
     def increment_rentals(self):
         self.rental_count = models.F("rental_count") + 1
         self.save(update_fields=["rental_count"])
 
     def update_average_rating(self, rating):
-        total_rating = models.F("average_rating") * models.F("rental_count")
-        total_rating += rating
-        self.average_rating = total_rating / (models.F("rental_count") + 1)
-        self.save(update_fields=["average_rating"])
+        # Batch callers should use ratings.ingest_ratings directly.
+        ingest_ratings([(self.pk, rating)])
+        self.refresh_from_db(fields=["average_rating", "rating_sum", "rating_count"])
+
+    def get_quote(self, days):
+        """Cheapest price for renting this product for ``days`` days."""
+        return quote_product(self, days)
 
     def get_average_rating(self):
         return self.average_rating if self.average_rating else 0
 
+    def get_availability(self):
+        """
+        Return the availability bitmap. Products loaded with
+        ``select_related("availability")`` need no extra query. A product
+        without a stored bitmap gets one built in memory, not saved.
+        """
+        try:
+            availability = self.availability
+        except ProductAvailability.DoesNotExist:
+            availability = build_availability(self)
+            self.availability = availability
+        return availability
+
     def is_date_available(self, date):
+        return self.is_range_available(date, date)
+
+    def is_range_available(self, start, end):
+        """Whether every day in [start, end] is free."""
+        check_range(start, end)
+        availability = self.get_availability()
+        if availability.covers(start, end):
+            return availability.is_free(start, end)
         return not self.unavailable_periods.filter(
-            models.Q(
-                models.Q(is_range=False, single_date=date)
-                | models.Q(is_range=True, range_start__lte=date, range_end__gte=date)
-            )
+            overlapping_periods_q(start, end)
         ).exists()
 
+    def get_month_availability(self, year, month):
+        """
+        Return a list with one boolean per day of the month, ``True`` when
+        the day is free.
+        """
+        start, end = month_bounds(year, month)
+        availability = self.get_availability()
+        if availability.covers(start, end):
+            busy = availability.busy_mask(start, end)
+        else:
+            periods = self.unavailable_periods.filter(
+                overlapping_periods_q(start, end)
+            ).values_list(*PERIOD_FIELDS)
+            busy = build_bitmap(periods, start, end.day)
+        return [not busy >> day & 1 for day in range(end.day)]
+
     def update_status(self, new_status, message=None):
         self.status = new_status
         self.status_message = message
@@ -0,0 +1,148 @@
+"""
+Rental quotes built from a product's pricing tiers.
+
+A quote is the cheapest mix of day/week/month tiers that covers the requested
+number of days. Each tier may be used at most ``max_period`` times (when set),
+and a quote may cover more days than requested when a longer unit is cheaper
+than the days it replaces (e.g. a weekly price below six daily prices).
+Rentals longer than ``MAX_QUOTE_DAYS`` are not quoted.
+
+Quotes are memoised per (tier signature, days). The signature is the sorted
+tuple of ``(duration_unit, base_price, max_period)`` rows, so editing a tier
+changes the key and stale quotes are never served.
+"""
+
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from math import ceil
+
+
+UNIT_DAYS = {
+    "day": 1,
+    "week": 7,
+    "month": 30,
+}
+
+QUOTE_CACHE_SIZE = 65536
+# Longest rental that is quoted; longer requests get no quote
+MAX_QUOTE_DAYS = 3 * 365
+
+Quote = namedtuple("Quote", ["days", "total", "units"])
+Quote.__doc__ = """
+Price of a rental.
+
+    days: Requested rental length in days
+    total: Total price
+    units: Tuple of (duration_unit, count) pairs used, longest unit first
+"""
+
+
+def tier_signature(tiers):
+    """
+    Return the memoisation key for an iterable of ``PricingTier`` instances
+    or ``(duration_unit, base_price, max_period)`` tuples.
+    """
+    rows = (
+        tier
+        if isinstance(tier, tuple)
+        else (tier.duration_unit, tier.base_price, tier.max_period)
+        for tier in tiers
+    )
+    return tuple(sorted(rows, key=lambda row: -UNIT_DAYS[row[0]]))
+
+
+def _bundles(signature, days):
+    """
+    Split each tier into bundles of 1, 2, 4, ... units (binary splitting), so
+    any count up to the tier's limit is a subset of its bundles. A tier
+    without ``max_period`` is limited to the units needed to cover ``days``.
+
+    Yields ``(unit, count, length, price)`` per bundle.
+    """
+    for unit, price, max_period in signature:
+        length = UNIT_DAYS[unit]
+        limit = ceil(days / length)
+        if max_period is not None:
+            limit = min(limit, max_period)
+        size = 1
+        while limit > 0:
+            count = min(size, limit)
+            yield unit, count, count * length, count * price
+            limit -= count
+            size *= 2
+
+
+@lru_cache(maxsize=QUOTE_CACHE_SIZE)
+def cheapest_quote(signature, days):
+    """
+    Return the cheapest ``Quote`` for ``days`` using the tiers in
+    ``signature``, or ``None`` when the tiers cannot cover that many days or
+    ``days`` is outside ``1..MAX_QUOTE_DAYS``.
+
+    Bounded knapsack over covered days, capped at ``days`` so that longer
+    units may overshoot. Runs in O(days * bundles).
+    """
+    if not 0 < days <= MAX_QUOTE_DAYS or not signature:
+        return None
+
+    # cheapest[covered] is the lowest total covering ``covered`` days
+    # (``days`` meaning "at least days") with the bundles seen so far.
+    cheapest = [None] * (days + 1)
+    cheapest[0] = 0
+    taken = []
+    for unit, count, length, price in _bundles(signature, days):
+        # Each bundle is used at most once: walk down so a state updated by
+        # this bundle is never extended by it again.
+        sources = {}
+        for covered in range(days - 1, -1, -1):
+            if cheapest[covered] is None:
+                continue
+            target = min(days, covered + length)
+            total = cheapest[covered] + price
+            if cheapest[target] is None or total < cheapest[target]:
+                cheapest[target] = total
+                sources[target] = covered
+        taken.append((unit, count, sources))
+
+    if cheapest[days] is None:
+        return None
+
+    counts = defaultdict(int)
+    covered = days
+    for unit, count, sources in reversed(taken):
+        if covered in sources:
+            counts[unit] += count
+            covered = sources[covered]
+    units = tuple((unit, counts[unit]) for unit, _, _ in signature if counts[unit])
+    return Quote(days=days, total=cheapest[days], units=units)
+
+
+def quote_product(product, days):
+    """
+    Quote a single product. Uses prefetched ``pricing_tiers`` when present.
+    """
+    return cheapest_quote(tier_signature(product.pricing_tiers.all()), days)
+
+
+def quote_products(product_ids, days):
+    """
+    Quote many products at once, e.g. a page of search results.
+
+    All tiers are loaded with one query and every distinct tier set is priced
+    once, so products sharing a tier set (or a set priced earlier in this
+    process) cost a dictionary lookup.
+
+    Returns a dict mapping product id to ``Quote`` (or ``None``).
+    """
+    from .models import PricingTier
+
+    rows = defaultdict(list)
+    for product_id, unit, price, max_period in PricingTier.objects.filter(
+        product_id__in=product_ids
+    ).values_list("product_id", "duration_unit", "base_price", "max_period"):
+        rows[product_id].append((unit, price, max_period))
+
+    return {
+        product_id: cheapest_quote(tier_signature(rows.get(product_id, ())), days)
+        for product_id in product_ids
+    }
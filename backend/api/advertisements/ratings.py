@@ -0,0 +1,97 @@
+"""
+Rating aggregation.
+
+Products and their owners keep exact running totals (``rating_sum`` and
+``rating_count``). ``average_rating`` is derived from them on every write, so
+it never accumulates rounding error. Ratings are applied in batches: one
+UPDATE per chunk of products and one per chunk of owners, whatever the number
+of ratings.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from rest_framework.serializers import ValidationError
+from users.authentication import forget_user
+from users.cache import invalidate_profiles
+from django.utils.translation import gettext as _
+
+
+MIN_RATING = Decimal("0")
+MAX_RATING = Decimal("5")
+UPDATE_BATCH_SIZE = 500
+
+
+def _totals(ratings):
+    totals = defaultdict(lambda: [Decimal("0"), 0])
+    for key, rating in ratings:
+        rating = Decimal(str(rating))
+        if not MIN_RATING <= rating <= MAX_RATING:
+            raise ValidationError(_("Rating must be between 0 and 5."))
+        totals[key][0] += rating
+        totals[key][1] += 1
+    return totals
+
+
+def _apply_totals(queryset, totals):
+    """Add ``totals`` ({pk: [sum, count]}) to the rows of ``queryset``."""
+    items = list(totals.items())
+    for start in range(0, len(items), UPDATE_BATCH_SIZE):
+        batch = items[start : start + UPDATE_BATCH_SIZE]
+
+        def delta(index, output_field):
+            return Case(
+                *(When(pk=pk, then=Value(value[index])) for pk, value in batch),
+                default=Value(0),
+                output_field=output_field,
+            )
+
+        sum_delta = delta(0, DecimalField(max_digits=12, decimal_places=2))
+        count_delta = delta(1, DecimalField(max_digits=12, decimal_places=0))
+        queryset.filter(pk__in=[pk for pk, _ in batch]).update(
+            rating_sum=F("rating_sum") + sum_delta,
+            rating_count=F("rating_count") + count_delta,
+            # The right-hand side sees the pre-update totals.
+            # Cast so that SQLite does not fall back to integer division.
+            average_rating=Cast(
+                Cast(F("rating_sum") + sum_delta, FloatField())
+                / Cast(F("rating_count") + count_delta, FloatField()),
+                DecimalField(max_digits=3, decimal_places=2),
+            ),
+        )
+
+
+def ingest_ratings(ratings):
+    """
+    Apply a batch of ratings to products and their owners.
+
+    Args:
+        ratings: Iterable of ``(product_id, rating)`` pairs. IDs may be
+            strings, as in Celery task arguments.
+    """
+    from .models import Product
+
+    to_pk = Product._meta.pk.to_python
+    product_totals = _totals((to_pk(pk), rating) for pk, rating in ratings)
+    if not product_totals:
+        return
+
+    with transaction.atomic():
+        owners = dict(
+            Product.objects.filter(pk__in=product_totals).values_list("pk", "owner_id")
+        )
+        owner_totals = defaultdict(lambda: [Decimal("0"), 0])
+        for product_id, (rating_sum, count) in product_totals.items():
+            if product_id in owners:
+                owner_totals[owners[product_id]][0] += rating_sum
+                owner_totals[owners[product_id]][1] += count
+
+        _apply_totals(Product.objects.all(), product_totals)
+        _apply_totals(get_user_model().objects.all(), owner_totals)
+        invalidate_profiles(owner_totals)
+        # This process's cached copies of the owners hold the old totals
+        transaction.on_commit(lambda: [forget_user(pk) for pk in owner_totals])
@@ -0,0 +1,171 @@
+"""
+Ranked full-text search over products.
+
+Each product is indexed with three weighted parts: the title (highest), the
+display label of its product type, and the description (lowest).
+
+- PostgreSQL: a ``search_vector`` tsvector column on the product table with a
+  GIN index. The column is not declared on the model; it is added by
+  migration 0005 and written here with raw SQL.
+- SQLite: an FTS5 shadow table, ``advertisements_product_fts``, ranked with
+  bm25. Its rowid is derived from the product id (``fts_rowid``), so a
+  product's entry is replaced without scanning the table; searches join it
+  to the product table once on ``product_id``.
+
+Rows are refreshed from the ``Product`` post_save/post_delete signals, so only
+the product that changed is re-indexed. ``manage.py reindex_products``
+rebuilds everything in batches.
+"""
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils import translation
+from django.utils.encoding import force_str
+
+from .constants import PRODUCT_TYPE_DISPLAY
+
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "advertisements_product_fts"
+# bm25 column weights for (title, type_label, description)
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+INDEXED_FIELDS = ("title", "product_type", "description")
+
+PG_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(%s, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(%s, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(%s, '')), 'C')"
+)
+PG_QUERY_SQL = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+
+
+def type_label(product_type):
+    with translation.override(settings.LANGUAGE_CODE):
+        return force_str(PRODUCT_TYPE_DISPLAY.get(product_type, ""))
+
+
+def _pk_param(connection, pk):
+    # UUIDs are stored as 32-char hex strings on backends without a native
+    # uuid type, and FTS rows must match that representation.
+    if connection.vendor == "postgresql":
+        return pk
+    return pk.hex
+
+
+def fts_rowid(pk):
+    """
+    FTS5 rows are keyed by an integer rowid: use the leading 64 bits of the
+    product's UUID. A collision needs billions of products.
+    """
+    return int.from_bytes(pk.bytes[:8], "big", signed=True)
+
+
+def index_rows(connection, rows):
+    """
+    Write index entries for ``rows`` of ``(pk, title, product_type,
+    description)``.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.executemany(
+                f"UPDATE advertisements_product SET search_vector = {PG_VECTOR_SQL} "
+                "WHERE id = %s",
+                [
+                    (title, type_label(product_type), description, pk)
+                    for pk, title, product_type, description in rows
+                ],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(fts_rowid(row[0]),) for row in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} "
+                "(rowid, product_id, title, type_label, description) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [
+                    (
+                        fts_rowid(pk),
+                        _pk_param(connection, pk),
+                        title,
+                        type_label(product_type),
+                        description,
+                    )
+                    for pk, title, product_type, description in rows
+                ],
+            )
+
+
+def index_product(product, using="default"):
+    index_rows(
+        connections[using],
+        [(product.pk, product.title, product.product_type, product.description)],
+    )
+
+
+def unindex_product(product, using="default"):
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [fts_rowid(product.pk)]
+        )
+
+
+def _fts_match(query):
+    # Quote every term so user input cannot inject FTS5 operators; the last
+    # term is a prefix match for type-ahead.
+    terms = ['"%s"' % term.replace('"', '""') for term in query.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_products(queryset, query):
+    """
+    Filter ``queryset`` to products matching ``query`` and order them by
+    relevance. The relevance is available as the ``search_rank`` annotation
+    (higher is better). Category, type and status filters can be applied
+    before or after.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+    if vendor == "postgresql":
+        rank = RawSQL(
+            f'ts_rank("{table}"."search_vector", {PG_QUERY_SQL})',
+            [query],
+            output_field=FloatField(),
+        )
+        match = RawSQL(
+            f'"{table}"."search_vector" @@ {PG_QUERY_SQL}',
+            [query],
+            output_field=BooleanField(),
+        )
+        return (
+            queryset.filter(match)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-created_at")
+        )
+
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    # Join the FTS table once: MATCH picks the rows, each product is then
+    # found by primary key, and bm25() is read from the same row. bm25() is
+    # negative, lower meaning more relevant; flip it so that both backends
+    # sort search_rank descending.
+    return queryset.extra(
+        select={"search_rank": f"-bm25({FTS_TABLE}, {weights})"},
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE} MATCH %s", f'{FTS_TABLE}.product_id = "{table}"."id"'],
+        params=[_fts_match(query)],
+    ).order_by("-search_rank", "-created_at")
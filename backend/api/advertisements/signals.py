@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .availability import rebuild_availability
+from .facets import FACET_FIELDS, adjust_facet_count, facet_key
+from .images import delete_variants, has_current_variants
+from .models import Product, ProductImage, UnavailablePeriod
+from .search import INDEXED_FIELDS, index_product, unindex_product
+
+
+FACET_FIELDS_SET = set(FACET_FIELDS)
+
+
+def _deleted_directly(origin, model):
+    """Whether a delete started from ``model`` itself rather than a cascade."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+@receiver(post_save, sender=UnavailablePeriod)
+@receiver(post_delete, sender=UnavailablePeriod)
+def refresh_product_availability(sender, instance, **kwargs):
+    # Bulk queryset operations bypass these signals; the daily
+    # refresh_availability_indexes task catches up with them.
+    if "origin" in kwargs and not _deleted_directly(
+        kwargs["origin"], UnavailablePeriod
+    ):
+        # Cascade from a product (or its owner) being deleted.
+        return
+    rebuild_availability(instance.product)
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(
+    sender, instance, update_fields=None, using=None, **kwargs
+):
+    # Counter and status updates pass update_fields and leave the text alone.
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    index_product(instance, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, using=None, **kwargs):
+    unindex_product(instance, using=using)
+
+
+@receiver(post_init, sender=Product)
+def remember_facet_key(sender, instance, **kwargs):
+    # Runs before from_db() clears _state.adding, so loaded and new instances
+    # look alike here; new ones are recognised through post_save's "created".
+    if FACET_FIELDS_SET & instance.get_deferred_fields():
+        instance._facet_key = None
+    else:
+        instance._facet_key = facet_key(instance)
+
+
+@receiver(post_save, sender=Product)
+def update_facet_counts(
+    sender, instance, created, update_fields=None, using=None, **kwargs
+):
+    if update_fields is not None and not FACET_FIELDS_SET & set(update_fields):
+        return
+    new_key = facet_key(instance)
+    old_key = None if created else getattr(instance, "_facet_key", None)
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        adjust_facet_count(old_key, -1, using=using)
+    if created or old_key is not None:
+        adjust_facet_count(new_key, 1, using=using)
+    # A saved instance whose previous facets are unknown (loaded with deferred
+    # facet fields) is left for reconcile_facet_counts.
+    instance._facet_key = new_key
+
+
+@receiver(pre_delete, sender=Product)
+def capture_facet_key(sender, instance, using=None, **kwargs):
+    # Instances loaded with deferred facet fields have no key; read it while
+    # the row still exists.
+    if getattr(instance, "_facet_key", None) is None:
+        instance._facet_key = (
+            Product._base_manager.using(using)
+            .filter(pk=instance.pk)
+            .values_list(*FACET_FIELDS)
+            .get()
+        )
+
+
+@receiver(post_delete, sender=Product)
+def decrement_facet_counts(sender, instance, using=None, **kwargs):
+    adjust_facet_count(instance._facet_key, -1, using=using)
+
+
+@receiver(post_save, sender=ProductImage)
+def queue_image_variants(sender, instance, **kwargs):
+    if has_current_variants(instance):
+        return
+    if instance.variants:
+        # Rendered from the image this one replaced
+        stale = instance.variants
+        transaction.on_commit(lambda: delete_variants(stale))
+    if not instance.image:
+        return
+    from .tasks import generate_product_image_variants
+
+    image_id = str(instance.pk)
+    transaction.on_commit(lambda: generate_product_image_variants.delay(image_id))
+
+
+@receiver(post_delete, sender=ProductImage)
+def delete_image_variants(sender, instance, **kwargs):
+    if instance.variants:
+        variants = instance.variants
+        transaction.on_commit(lambda: delete_variants(variants))
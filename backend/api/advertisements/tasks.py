@@ -0,0 +1,79 @@
+from celery import shared_task
+from django.utils import timezone
+from . import counters, facets
+from .availability import rebuild_availability
+from .images import generate_variants
+from .models import Product, ProductImage
+import logging
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_availability_indexes(batch_size=500):
+    """
+    Roll every availability bitmap forward so its horizon starts today.
+
+    Args:
+        batch_size: Number of products loaded per query
+    """
+    today = timezone.localdate()
+    stale = (
+        Product.objects.exclude(availability__horizon_start=today)
+        .order_by("pk")
+        .only("pk")
+    )
+
+    refreshed = 0
+    last_pk = None
+    while True:
+        batch = stale if last_pk is None else stale.filter(pk__gt=last_pk)
+        products = list(batch[:batch_size])
+        if not products:
+            break
+        for product in products:
+            rebuild_availability(product, horizon_start=today)
+        refreshed += len(products)
+        last_pk = products[-1].pk
+
+    logger.info(f"Refreshed availability bitmaps for {refreshed} products")
+    return refreshed
+
+
+@shared_task
+def reconcile_facet_counts():
+    """Repair facet counts that drifted through bulk queryset writes."""
+    drifted = facets.reconcile_facet_counts()
+    if drifted:
+        logger.warning(f"Repaired {drifted} drifted product facet counts")
+    return drifted
+
+
+@shared_task
+def flush_product_views():
+    """Write buffered product views to views_count."""
+    return counters.flush_views()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_product_image_variants(self, image_id, force=False):
+    """
+    Generate the thumbnail/card/full WebP and JPEG variants of an image.
+
+    Args:
+        image_id: ProductImage primary key
+        force: Regenerate even if variants exist for the current file
+    """
+    try:
+        product_image = ProductImage.objects.get(pk=image_id)
+    except ProductImage.DoesNotExist:
+        logger.warning(f"ProductImage {image_id} no longer exists")
+        return False
+
+    try:
+        return generate_variants(product_image, force=force)
+    except OSError as e:
+        # Storage hiccup or unreadable upload; retry before giving up.
+        logger.error(f"Error generating variants for image {image_id}: {str(e)}")
+        raise self.retry(exc=e)
@@ -1,3 +1,615 @@
-from django.test import TestCase
+import math
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from itertools import count
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, router, transaction
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgreSQLDatabaseWrapper,
+)
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.views import APIView
+
+from api.benchmarks import create_bench_product, create_bench_user
+from api.pagination import KeysetPagination
+from api.routers import ReplicaRoutingMiddleware, bind_user, choose_read_database
+from api.throttling import SlidingWindowMixin
+from users.authentication import load_user
+from users.cache import invalidate_profiles
+
+from .availability import build_bitmap, overlapping_periods_q
+from .constants import CATEGORY_CHOICES, PRODUCT_TYPE_CHOICES, STATUS_CHOICES
+from .facets import get_facet_counts, reconcile_facet_counts
+from .images import generate_variants, variant_files
+from .models import (
+    Product,
+    ProductAvailability,
+    ProductFacetCount,
+    ProductImage,
+    UnavailablePeriod,
+)
+from .pricing import MAX_QUOTE_DAYS, cheapest_quote, tier_signature
+from .ratings import ingest_ratings
+
+
+user_ids = count(10_000_000)
+
+
+def in_request(view):
+    """Run ``view()`` inside the routing middleware and return its result."""
+    result = {}
+
+    def get_response(request):
+        result["value"] = view()
+        return HttpResponse()
+
+    ReplicaRoutingMiddleware(get_response)(RequestFactory().get("/"))
+    return result["value"]
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], READ_YOUR_WRITES_WINDOW=5)
+class ReplicaRouterTests(TransactionTestCase):
+    """
+    ``api.routers`` against two SQLite databases. The same facet counter
+    holds a different count on each, so every read shows where it ran.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        key = dict(
+            category=CATEGORY_CHOICES[0][0],
+            product_type=PRODUCT_TYPE_CHOICES[0][0],
+            status=STATUS_CHOICES[0][0],
+        )
+        ProductFacetCount.objects.using("default").create(count=1, **key)
+        ProductFacetCount.objects.using("replica").create(count=2, **key)
+
+    def tearDown(self):
+        # flush skips the tables of databases the router won't migrate
+        ProductFacetCount.objects.using("replica").all().delete()
+
+    def read(self):
+        return ProductFacetCount.objects.get().count
+
+    def write(self, count):
+        row = ProductFacetCount.objects.get()
+        row.count = count
+        row.save()
+
+    def stored(self):
+        return {
+            alias: ProductFacetCount.objects.using(alias).get().count
+            for alias in ("default", "replica")
+        }
+
+    def test_reads_in_requests_run_on_the_replica(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            self.assertEqual(in_request(self.read), 2)
+        self.assertEqual(len(replica_queries), 1)
+
+    def test_reads_outside_requests_run_on_the_primary(self):
+        self.assertEqual(self.read(), 1)
+
+    def test_other_apps_read_from_the_primary(self):
+        user = create_bench_user()
+        self.assertEqual(
+            in_request(lambda: get_user_model().objects.get(pk=user.pk)), user
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_run_on_the_primary(self):
+        self.assertEqual(in_request(self.read), 1)
+
+    def test_select_for_update_and_writes_in_atomic_run_on_the_primary(self):
+        def view():
+            with transaction.atomic():
+                row = ProductFacetCount.objects.select_for_update().get()
+                row.count += 10
+                row.save()
+                return row.count
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            self.assertEqual(in_request(view), 11)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertEqual(self.stored(), {"default": 11, "replica": 2})
+
+    def test_reads_after_a_write_in_the_same_request_run_on_the_primary(self):
+        def view():
+            before = self.read()
+            self.write(5)
+            return before, self.read()
+
+        self.assertEqual(in_request(view), (2, 5))
+        self.assertEqual(self.stored(), {"default": 5, "replica": 2})
+
+    def test_user_reads_their_writes_from_the_primary(self):
+        writer, other = next(user_ids), next(user_ids)
+
+        def as_user(user_id, view):
+            def bound():
+                bind_user(user_id)
+                return view()
+
+            return bound
+
+        in_request(as_user(writer, lambda: self.write(7)))
+        self.assertEqual(in_request(as_user(writer, self.read)), 7)
+        self.assertEqual(in_request(as_user(other, self.read)), 2)
+
+    @override_settings(READ_YOUR_WRITES_WINDOW=0.05)
+    def test_stickiness_ends_after_the_window(self):
+        user_id = next(user_ids)
+
+        def write():
+            bind_user(user_id)
+            self.write(7)
+
+        def read():
+            bind_user(user_id)
+            return self.read()
+
+        in_request(write)
+        time.sleep(0.1)
+        self.assertEqual(in_request(read), 2)
+
+    def test_profile_reads_stick_to_the_profile_owner(self):
+        owner = next(user_ids)
+
+        def write():
+            bind_user(owner)
+            router.db_for_write(get_user_model())
+
+        in_request(write)
+        self.assertEqual(in_request(lambda: choose_read_database(owner)), "default")
+        self.assertEqual(
+            in_request(lambda: choose_read_database(next(user_ids))), "replica"
+        )
+
+    def test_users_whose_profile_changed_read_from_the_primary(self):
+        owner = next(user_ids)
+        # e.g. ingest_ratings updating the owner from another user's request
+        in_request(lambda: invalidate_profiles([owner]))
+        self.assertEqual(in_request(lambda: choose_read_database(owner)), "default")
+
+    def test_related_reads_follow_the_instance(self):
+        row = in_request(ProductFacetCount.objects.get)
+        self.assertEqual(row._state.db, "replica")
+        self.assertEqual(
+            in_request(lambda: router.db_for_read(Product, instance=row)), "replica"
+        )
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate("replica", "advertisements"))
+        self.assertTrue(router.allow_migrate("default", "advertisements"))
+
+
+class CheapestQuoteTests(SimpleTestCase):
+    def quote(self, tiers, days):
+        return cheapest_quote(tier_signature(tiers), days)
+
+    def test_mixes_units_for_the_lowest_total(self):
+        quote = self.quote([("day", 100, None), ("week", 500, None)], 9)
+        self.assertEqual(quote.total, 700)
+        self.assertEqual(quote.units, (("week", 1), ("day", 2)))
+
+    def test_longer_unit_may_cover_extra_days_when_cheaper(self):
+        quote = self.quote([("day", 100, None), ("week", 500, None)], 6)
+        self.assertEqual(quote.total, 500)
+        self.assertEqual(quote.units, (("week", 1),))
+
+    def test_max_period_limits_a_tier(self):
+        quote = self.quote([("day", 100, None), ("week", 300, 1)], 15)
+        self.assertEqual(quote.total, 1100)
+        self.assertEqual(quote.units, (("week", 1), ("day", 8)))
+
+    def test_limited_tiers_that_cannot_cover_the_days(self):
+        self.assertIsNone(self.quote([("day", 100, 3)], 4))
+        self.assertIsNone(self.quote([("week", 500, 1), ("day", 100, 2)], 10))
+
+    def test_no_quote_without_tiers_or_days(self):
+        self.assertIsNone(self.quote([], 5))
+        self.assertIsNone(self.quote([("day", 100, None)], 0))
+        self.assertIsNone(self.quote([("day", 100, None)], -3))
+
+    def test_no_quote_beyond_the_maximum_length(self):
+        tiers = [("day", 100, None), ("week", 500, None), ("month", 1800, None)]
+        self.assertIsNotNone(self.quote(tiers, MAX_QUOTE_DAYS))
+        self.assertIsNone(self.quote(tiers, MAX_QUOTE_DAYS + 1))
+
+
+class AvailabilityBitmapTests(SimpleTestCase):
+    """Range checks answered from the bitmap, without queries."""
+
+    horizon_start = date(2026, 1, 1)
+
+    def product(self, *periods):
+        availability = ProductAvailability(
+            horizon_start=self.horizon_start,
+            horizon_days=60,
+            bitmap=ProductAvailability.encode(
+                build_bitmap(periods, self.horizon_start, 60)
+            ),
+        )
+        product = Product()
+        product.availability = availability
+        return product
+
+    def day(self, n):
+        return self.horizon_start + timedelta(days=n)
+
+    def test_busy_mask_is_relative_to_the_range_start(self):
+        availability = self.product((self.day(3), self.day(4))).availability
+        self.assertEqual(availability.busy_mask(self.day(2), self.day(6)), 0b110)
+        self.assertEqual(availability.busy_mask(self.day(4), self.day(4)), 1)
+        self.assertEqual(availability.busy_mask(self.day(5), self.day(9)), 0)
+
+    def test_ranges_touching_a_busy_day_are_unavailable(self):
+        product = self.product((self.day(10), self.day(12)))
+        self.assertFalse(product.is_range_available(self.day(5), self.day(10)))
+        self.assertFalse(product.is_range_available(self.day(12), self.day(20)))
+        self.assertFalse(product.is_date_available(self.day(11)))
+        self.assertTrue(product.is_range_available(self.day(0), self.day(9)))
+        self.assertTrue(product.is_date_available(self.day(13)))
+
+    def test_empty_bitmap_is_available_up_to_the_horizon_end(self):
+        product = self.product()
+        self.assertEqual(product.availability.bitmap, b"")
+        self.assertTrue(product.is_range_available(self.day(0), self.day(59)))
+
+    def test_inverted_ranges_are_rejected(self):
+        product = self.product((self.day(3), self.day(4)))
+        with self.assertRaises(ValueError):
+            product.availability.busy_mask(self.day(5), self.day(2))
+        with self.assertRaises(ValueError):
+            product.is_range_available(self.day(5), self.day(2))
+        # Also before falling back to a query outside the horizon
+        with self.assertRaises(ValueError):
+            product.is_range_available(self.day(90), self.day(80))
+
+
+class StoredAvailabilityTests(TestCase):
+    def test_reads_build_the_bitmap_without_storing_it(self):
+        product = create_bench_product()
+        today = timezone.localdate()
+
+        with CaptureQueriesContext(connections["default"]) as queries:
+            self.assertTrue(product.is_range_available(today, today))
+        self.assertFalse(ProductAvailability.objects.exists())
+        self.assertTrue(all(query["sql"].startswith("SELECT") for query in queries))
+
+    def test_period_writes_store_the_bitmap(self):
+        product = create_bench_product()
+        day = timezone.localdate() + timedelta(days=3)
+        UnavailablePeriod.objects.create(product=product, single_date=day)
+
+        product = Product.objects.select_related("availability").get(pk=product.pk)
+        self.assertEqual(product.availability.busy_mask(day, day), 1)
+        self.assertFalse(product.is_date_available(day))
+
+class PeriodsWithoutDatesTests(TestCase):
+    """A period missing a bound blocks nothing, on every backend."""
+
+    def test_period_without_an_end_blocks_nothing(self):
+        product = create_bench_product()
+        today = timezone.localdate()
+        UnavailablePeriod.objects.create(
+            product=product, is_range=True, range_start=today
+        )
+        self.assertTrue(product.is_date_available(today))
+        self.assertIn(product, Product.objects.available_between(today, today))
+
+    def test_postgresql_overlap_query_skips_null_bounds(self):
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": "unused",
+        }
+        postgresql = PostgreSQLDatabaseWrapper(settings_dict, "postgresql")
+        today = timezone.localdate()
+        query = UnavailablePeriod.objects.filter(
+            overlapping_periods_q(today, today, "postgresql")
+        ).query
+        sql, _ = query.get_compiler(connection=postgresql).as_sql()
+        self.assertIn('"start_date" IS NOT NULL', sql)
+        self.assertIn('"end_date" IS NOT NULL', sql)
+
+class IngestRatingsTests(TestCase):
+    def totals(self, row):
+        row.refresh_from_db()
+        return row.rating_count, row.average_rating
+
+    def test_string_ids_update_the_product_and_its_owner(self):
+        product = create_bench_product()
+        other = create_bench_product(owner=product.owner)
+
+        ingest_ratings([(str(product.pk), 4), (str(other.pk), 3), (product.pk, 5)])
+
+        self.assertEqual(self.totals(product), (2, Decimal("4.50")))
+        self.assertEqual(self.totals(other), (1, 3))
+        self.assertEqual(self.totals(product.owner), (3, 4))
+
+    def test_owners_are_dropped_from_the_user_cache(self):
+        product = create_bench_product()
+        load_user(product.owner.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_ratings([(str(product.pk), 5)])
+
+        self.assertEqual(load_user(product.owner.pk).rating_count, 1)
+
+
+def png(color, size=(40, 40)):
+    buffer = BytesIO()
+    Image.new("RGBA", size, color).save(buffer, "PNG")
+    return ContentFile(buffer.getvalue(), "image.png")
+
+
+@mock.patch("advertisements.tasks.generate_product_image_variants.delay")
+class ProductImageVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+    def create_image(self, content):
+        image = ProductImage(product=create_bench_product())
+        image.image.save(content.name, content)
+        generate_variants(image)
+        return image
+
+    def open_variant(self, image, extension):
+        with default_storage.open(image.variants["card"][extension]) as variant:
+            return Image.open(BytesIO(variant.read()))
+
+    def test_transparency_is_kept_in_webp_and_white_in_jpeg(self, delay):
+        image = self.create_image(png((255, 0, 0, 0)))
+
+        webp = self.open_variant(image, "webp")
+        self.assertEqual(webp.mode, "RGBA")
+        self.assertEqual(webp.getpixel((0, 0))[3], 0)
+        jpeg = self.open_variant(image, "jpeg")
+        self.assertTrue(all(channel > 245 for channel in jpeg.getpixel((0, 0))))
+
+    def test_variants_are_deleted_with_their_image(self, delay):
+        image = self.create_image(png((255, 0, 0, 255)))
+        files = variant_files(image.variants)
+        self.assertTrue(all(default_storage.exists(path) for path in files))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+
+        self.assertFalse(any(default_storage.exists(path) for path in files))
+
+    def test_variants_of_a_replaced_image_are_deleted(self, delay):
+        image = self.create_image(png((255, 0, 0, 255)))
+        old_files = variant_files(image.variants)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = png((0, 0, 255, 255))
+            image.save()
+        self.assertFalse(any(default_storage.exists(path) for path in old_files))
+        delay.assert_called_once_with(str(image.pk))
+
+        generate_variants(image)
+        new_files = variant_files(image.variants)
+        self.assertFalse(set(new_files) & set(old_files))
+        self.assertTrue(all(default_storage.exists(path) for path in new_files))
+
+
+class FacetCountTests(TestCase):
+    def counts(self):
+        return {
+            (row.category, row.product_type, row.status): row.count
+            for row in ProductFacetCount.objects.filter(count__gt=0)
+        }
+
+    def test_creating_products_counts_them(self):
+        create_bench_product()
+        create_bench_product()
+        create_bench_product(status="draft")
+        self.assertEqual(
+            self.counts(),
+            {
+                ("electronics", "laptop", "active"): 2,
+                ("electronics", "laptop", "draft"): 1,
+            },
+        )
+
+    def test_changing_status_or_category_moves_the_product(self):
+        product = create_bench_product()
+        product.status = "suspended"
+        product.save()
+        self.assertEqual(self.counts(), {("electronics", "laptop", "suspended"): 1})
+
+        product = Product.objects.get(pk=product.pk)
+        product.category, product.product_type = "sports_outdoor", "football"
+        product.save(update_fields=["category", "product_type"])
+        self.assertEqual(
+            self.counts(), {("sports_outdoor", "football", "suspended"): 1}
+        )
+
+    def test_updates_of_other_fields_leave_counts_alone(self):
+        product = create_bench_product()
+        with CaptureQueriesContext(connections["default"]) as queries:
+            product.increment_rentals()
+        self.assertFalse(any("facet" in query["sql"] for query in queries))
+        self.assertEqual(self.counts(), {("electronics", "laptop", "active"): 1})
+
+    def test_deleting_products_decrements_their_counts(self):
+        kept = create_bench_product()
+        create_bench_product().delete()
+        Product.objects.only("pk").get(pk=create_bench_product().pk).delete()
+        self.assertEqual(self.counts(), {("electronics", "laptop", "active"): 1})
+
+        kept.owner.delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_facets_are_counted_with_the_other_filters(self):
+        create_bench_product()
+        create_bench_product(status="draft")
+        create_bench_product(category="sports_outdoor", product_type="football")
+
+        facets = get_facet_counts(status="active")
+        self.assertEqual(facets["status"], {"active": 2, "draft": 1})
+        self.assertEqual(facets["category"], {"electronics": 1, "sports_outdoor": 1})
+
+    def test_reconcile_repairs_bulk_writes(self):
+        create_bench_product()
+        create_bench_product()
+        Product.objects.update(status="draft")
+
+        self.assertEqual(reconcile_facet_counts(), 2)
+        self.assertEqual(self.counts(), {("electronics", "laptop", "draft"): 2})
+        self.assertEqual(reconcile_facet_counts(), 0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        owner = create_bench_user()
+        self.products = [create_bench_product(owner=owner) for _ in range(7)]
+        # Five products share one timestamp, so pages split inside the tie
+        tied = timezone.now()
+        Product.objects.filter(
+            pk__in=[product.pk for product in self.products[:5]]
+        ).update(created_at=tied)
+        self.expected = list(
+            Product.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+
+    def page(self, url="/products/?page_size=2"):
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get(url))
+        results = paginator.paginate_queryset(Product.objects.all(), request)
+        return [product.pk for product in results], paginator
+
+    def test_walks_every_row_once_across_ties(self):
+        seen = []
+        pks, paginator = self.page()
+        while True:
+            seen += pks
+            link = paginator.get_next_link()
+            if link is None:
+                break
+            pks, paginator = self.page(link)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_the_previous_page(self):
+        first, paginator = self.page()
+        self.assertIsNone(paginator.get_previous_link())
+        second, paginator = self.page(paginator.get_next_link())
+        third, paginator = self.page(paginator.get_next_link())
+        self.assertEqual(self.page(paginator.get_previous_link())[0], second)
+        self.assertEqual(first + second + third, self.expected[:6])
+
+    def test_tampered_cursors_are_rejected(self):
+        _, paginator = self.page()
+        token = parse_qs(urlparse(paginator.get_next_link()).query)["cursor"][0]
+        unsigned = signing.dumps({"pk": str(self.expected[0])}, salt="other")
+        incomplete = signing.dumps(
+            {"pk": str(self.expected[0])}, salt=KeysetPagination.signing_salt
+        )
+        for cursor in (token[:-2] + "xx", unsigned, incomplete, "garbage"):
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                self.page(f"/products/?cursor={cursor}")
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.page("/products/?page_size=0")[0]), 7)
+        with mock.patch.object(KeysetPagination, "max_page_size", 3):
+            self.assertEqual(len(self.page("/products/?page_size=50")[0]), 3)
+
+
+class LimitedThrottle(SlidingWindowMixin, SimpleRateThrottle):
+    rate = "3/min"
+
+    def get_cache_key(self, request, view):
+        return self.key_name
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    window_start = 60 * 1_000_000
+
+    def setUp(self):
+        self.key_name = f"test-{next(user_ids)}"
+
+    def request_at(self, offset):
+        throttle = LimitedThrottle()
+        throttle.key_name = self.key_name
+        throttle.timer = lambda: self.window_start + offset
+        return throttle.allow_request(None, None), throttle
+
+    def test_limit_applies_within_a_window(self):
+        self.assertEqual(
+            [self.request_at(offset)[0] for offset in (0, 10, 20, 30)],
+            [True, True, True, False],
+        )
+
+    def test_previous_window_counts_by_its_overlap(self):
+        for offset in (0, 1, 2):
+            self.request_at(offset)
+        # A third of the way into the next window, 3 * 2/3 + 1 = 3 is allowed
+        self.assertTrue(self.request_at(80)[0])
+        # Then 3 * 2/3 + 2 = 4 is not
+        self.assertFalse(self.request_at(80)[0])
+        # Fully past the previous window only the current one counts
+        self.assertTrue(self.request_at(120)[0])
+
+    def rejected_after(self, offsets):
+        self.setUp()
+        *accepted, rejected_at = offsets
+        for offset in accepted:
+            self.request_at(offset)
+        allowed, throttle = self.request_at(rejected_at)
+        self.assertFalse(allowed)
+        return rejected_at, math.ceil(throttle.wait())
+
+    def test_retry_after_is_the_first_moment_a_request_is_allowed(self):
+        scenarios = [(0, 1, 2, 30), (0, 1, 2, 59), (0, 1, 60, 70), (0, 1, 2, 60, 70)]
+        for offsets in scenarios:
+            with self.subTest(offsets=offsets):
+                rejected_at, wait = self.rejected_after(offsets)
+                self.assertGreater(wait, 0)
+                self.assertFalse(self.request_at(rejected_at + wait - 1)[0])
+
+                rejected_at, wait = self.rejected_after(offsets)
+                self.assertTrue(self.request_at(rejected_at + wait)[0])
+
+    def test_throttled_responses_carry_retry_after(self):
+        class LimitedView(APIView):
+            permission_classes = []
+            throttle_classes = [LimitedThrottle]
+
+            def get(self, request):
+                return HttpResponse()
+
+        LimitedThrottle.key_name = self.key_name
+        self.addCleanup(delattr, LimitedThrottle, "key_name")
+        view = LimitedView.as_view()
+        for _ in range(3):
+            self.assertEqual(view(APIRequestFactory().get("/")).status_code, 200)
+        response = view(APIRequestFactory().get("/"))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
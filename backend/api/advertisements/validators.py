@@ -1,6 +1,7 @@
 from rest_framework.serializers import ValidationError
 from django.utils.translation import gettext as _
 from django.utils import timezone
+from api.validators import validate_image_upload
 
 
 def validate_product_images(images):
@@ -9,17 +10,20 @@ def validate_product_images(images):
     - Requires at least one image
     - Maximum 10 images
     - Each image must be < 5MB
-    - Only allows jpeg, jpg, png, gif formats
+    - Only allows jpeg, jpg, png, gif formats (sniffed from the file header)
+    - Dimensions are read from the header and bounded
     """
     if len(images) < 1:
         raise ValidationError(_("At least one image is required."))
     if len(images) > 10:
         raise ValidationError(_("Maximum of 10 images allowed."))
     for image in images:
-        if image.size > 1024 * 1024 * 5:
-            raise ValidationError(_("Image size must be less than 5MB."))
-        if image.content_type not in ["image/jpeg", "image/jpg", "image/png", "image/gif"]:
-            raise ValidationError(_("Invalid image format."))
+        validate_image_upload(
+            image,
+            allowed_formats={"jpeg", "png", "gif"},
+            max_size=1024 * 1024 * 5,
+            size_message=_("Image size must be less than 5MB."),
+        )
     return images
 
 
@@ -0,0 +1,114 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks run against the configured database inside a transaction that is
+always rolled back, so they can be pointed at a development database without
+leaving fixture rows behind.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from uuid import uuid4
+
+from django.db import connection, transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back(using=None):
+    """Run the block in a transaction and discard everything it wrote."""
+    try:
+        with transaction.atomic(using=using):
+            yield
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def timer(results, label):
+    """Store the wall-clock seconds spent in the block under ``results[label]``."""
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
+
+
+TRANSACTION_STATEMENTS = {"BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE"}
+
+
+class QueryCounter:
+    """
+    Count the SQL statements executed on ``connection`` inside the block,
+    in total and as ``reads``, ``writes`` and ``transaction`` statements.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.kinds = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        verb = sql.split(None, 1)[0].upper()
+        if verb in TRANSACTION_STATEMENTS:
+            self.kinds["transaction"] += 1
+        elif verb in ("SELECT", "WITH"):
+            self.kinds["reads"] += 1
+        else:
+            self.kinds["writes"] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile (0-100) of ``samples`` by nearest rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def create_bench_user(**extra_fields):
+    """Create a throwaway user to own benchmark fixtures."""
+    from django.contrib.auth import get_user_model
+
+    suffix = uuid4().hex[:12]
+    return get_user_model().objects.create_user(
+        email=f"bench_{suffix}@example.com",
+        username=f"bench_{suffix}",
+        password=None,
+        **extra_fields,
+    )
+
+
+def create_bench_product(owner=None, **fields):
+    """Create a throwaway product, owned by a new user unless ``owner`` is given."""
+    from django.utils import timezone
+
+    from advertisements.models import Product
+
+    defaults = dict(
+        title="Bench product",
+        category="electronics",
+        product_type="laptop",
+        description="Benchmark fixture",
+        location="Dhaka",
+        purchase_year=timezone.localdate(),
+        purchase_price=1000,
+        ownership_history="firsthand",
+        status="active",
+    )
+    return Product.objects.create(
+        owner=owner or create_bench_user(), **{**defaults, **fields}
+    )
@@ -0,0 +1,136 @@
+"""
+Versioned two-level cache.
+
+Values live in the shared Django cache (Redis in production, see
+``CACHES``) under keys stamped with a version number per namespace.
+Invalidating a namespace bumps its version, which every process sees on its
+next read, and the old entries simply expire.
+
+In front of the shared cache each process keeps a small L1. The version is
+always read from the shared cache, so L1 entries can never be served after an
+invalidation; L1 only saves fetching and unpickling the value itself.
+
+On a miss, only the process that wins a short lock (``cache.add``) computes
+the value. The others poll for it for up to ``CACHE_LOCK_WAIT`` seconds and
+compute it themselves only if it never shows up.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+MISSING = object()
+LOCK_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LocalCache:
+    """Thread-safe, size-bounded in-process cache with a per-entry TTL."""
+
+    MISSING = MISSING
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(_setting("CACHE_L1_MAX_ENTRIES", 1024))
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def get_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1, so that a version lost to
+        # eviction cannot come back with a number already used.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def _compute_once(key, compute, timeout):
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + _setting("CACHE_LOCK_WAIT", 2)
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = cache.get(key, MISSING)
+        if value is not MISSING:
+            return value
+    return compute()
+
+
+def get_or_compute(namespace, compute, timeout):
+    """
+    Return the cached value of ``namespace``, computing it with ``compute()``
+    on a miss.
+
+    ``compute`` must read its data after this function is called (not reuse
+    objects loaded earlier in the request), so that the value stored under the
+    current version is never older than that version.
+    """
+    key = f"{namespace}:v{get_version(namespace)}"
+    value = local_cache.get(key)
+    if value is not MISSING:
+        return value
+
+    value = cache.get(key, MISSING)
+    if value is MISSING:
+        value = _compute_once(key, compute, timeout)
+    local_cache.set(key, value, _setting("CACHE_L1_TIMEOUT", 5))
+    return value
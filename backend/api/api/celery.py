@@ -10,3 +10,7 @@ app.conf.enable_utc = False
 app.conf.update(timezone="Asia/Dhaka")
 
 app.autodiscover_tasks()
+# The project package is not a Django app; register its tasks explicitly.
+app.autodiscover_tasks(["api"])
+
+from . import db, task_metrics  # noqa: E402,F401
@@ -0,0 +1,44 @@
+"""
+Database connection pools of the current process.
+
+In production every process keeps a psycopg pool per database
+(``OPTIONS["pool"]`` in ``api.settings.production``). Django creates it on the
+first query, so processes forked by gunicorn or uvicorn each open their own.
+Celery's prefork workers are handled here. The parent closes its pools before
+it forks children. A child also drops any pool it inherited, without touching
+the sockets, which still belong to the parent.
+"""
+
+from celery.signals import worker_init, worker_process_init
+from django.db import connections
+
+
+def get_pools():
+    """Return ``{alias: pool}`` for the pools this process has created."""
+    pools = {}
+    for connection in connections.all():
+        pool = getattr(connection, "_connection_pools", {}).get(connection.alias)
+        if pool is not None:
+            pools[connection.alias] = pool
+    return pools
+
+
+def get_pool_stats():
+    """
+    Return ``{alias: stats}`` for this process's pools. The stats come from
+    psycopg's ``ConnectionPool.get_stats``, e.g. ``pool_size``,
+    ``pool_available``, ``requests_waiting`` and ``connections_errors``.
+    """
+    return {alias: pool.get_stats() for alias, pool in get_pools().items()}
+
+
+@worker_init.connect
+def close_pools_before_fork(**kwargs):
+    for alias in get_pools():
+        connections[alias].close_pool()
+
+
+@worker_process_init.connect
+def drop_inherited_pools(**kwargs):
+    for alias in get_pools():
+        del connections[alias]._connection_pools[alias]
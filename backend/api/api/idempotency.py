@@ -0,0 +1,59 @@
+"""
+At-most-once execution of side effects such as sending an email.
+
+``claim`` marks an operation as running with ``SET NX`` in ``api.kvstore``
+before any other work is done. A duplicate (a second enqueue, a Celery retry
+or redelivery) finds the key and stops after that single lookup. Once the
+side effect happened the key is kept for ``ttl`` seconds; if the work fails
+before that, releasing the key lets a retry run. A worker that dies mid-way
+holds the key only for ``lock_ttl`` seconds. ``is_done`` tells an operation
+that is still running from one that already happened.
+"""
+
+from .kvstore import get_store
+
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_LOCK_TTL = 10 * 60
+RUNNING = "running"
+DONE = "done"
+
+
+def _store_key(scope, key):
+    return f"idempotency:{scope}:{key}"
+
+
+class Claim:
+    def __init__(self, key, ttl):
+        self.key = key
+        self.ttl = ttl
+        self.completed = False
+
+    def complete(self):
+        """The side effect happened; keep duplicates out for ``ttl``."""
+        get_store().set(self.key, DONE, ex=self.ttl)
+        self.completed = True
+
+    def release(self):
+        """
+        The side effect did not happen; let the next attempt run. Does
+        nothing once the claim is complete.
+        """
+        if not self.completed:
+            get_store().delete(self.key)
+
+
+def claim(scope, key, ttl=DEFAULT_TTL, lock_ttl=DEFAULT_LOCK_TTL):
+    """
+    Return a ``Claim`` on ``(scope, key)``, or ``None`` if the operation is
+    already running or done.
+    """
+    store_key = _store_key(scope, key)
+    if not get_store().set(store_key, RUNNING, nx=True, ex=lock_ttl):
+        return None
+    return Claim(store_key, ttl)
+
+
+def is_done(scope, key):
+    """Whether the operation on ``(scope, key)`` completed within its ``ttl``."""
+    return get_store().get(_store_key(scope, key)) == DONE.encode()
@@ -0,0 +1,188 @@
+"""
+Shared key-value store used for counters, locks and other short-lived state
+that every worker process must see.
+
+``get_store()`` returns a redis-py client for ``settings.REDIS_URL``. When the
+setting is empty (development, tests) it returns a process-local
+``LocalStore`` that implements the subset of the redis-py API used in this
+project, so calling code does not need to know which one it got.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                url = getattr(settings, "REDIS_URL", None)
+                if url:
+                    import redis
+
+                    _store = redis.Redis.from_url(url)
+                else:
+                    _store = LocalStore()
+    return _store
+
+
+def is_shared(store):
+    """Whether ``store`` is visible to other processes."""
+    return not isinstance(store, LocalStore)
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class LocalStore:
+    """
+    In-process stand-in for Redis. Values are stored and returned as bytes,
+    like redis-py does by default.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def _set_ttl(self, key, ex=None, px=None):
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        elif px is not None:
+            self._expires[key] = time.monotonic() + px / 1000
+        else:
+            self._expires.pop(key, None)
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = _encode(value)
+            self._set_ttl(key, ex, px)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._alive(key))
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._set_ttl(key, ex=seconds)
+            return True
+
+    def incrby(self, key, amount=1):
+        with self._lock:
+            value = int(self._data[key]) + amount if self._alive(key) else amount
+            self._data[key] = _encode(value)
+            return value
+
+    incr = incrby
+
+    def hincrby(self, name, key, amount=1):
+        with self._lock:
+            if not self._alive(name):
+                self._data[name] = defaultdict(int)
+            self._data[name][_encode(key)] += amount
+            return self._data[name][_encode(key)]
+
+    def hgetall(self, name):
+        with self._lock:
+            if not self._alive(name):
+                return {}
+            return {key: _encode(value) for key, value in self._data[name].items()}
+
+    def hlen(self, name):
+        with self._lock:
+            return len(self._data[name]) if self._alive(name) else 0
+
+    def rpush(self, name, *values):
+        with self._lock:
+            if not self._alive(name):
+                self._data[name] = []
+            self._data[name].extend(_encode(value) for value in values)
+            return len(self._data[name])
+
+    def lpop(self, name, count=None):
+        with self._lock:
+            if not self._alive(name):
+                return None
+            items = self._data[name]
+            popped = items[: 1 if count is None else count]
+            del items[: len(popped)]
+            if not items:
+                self.delete(name)
+            if count is None:
+                return popped[0] if popped else None
+            return popped or None
+
+    def llen(self, name):
+        with self._lock:
+            return len(self._data[name]) if self._alive(name) else 0
+
+    def pipeline(self, transaction=True):
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Queues commands and runs them atomically on ``execute()``."""
+
+    def __init__(self, store):
+        self._store = store
+        self._commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._store, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        with self._store._lock:
+            results = [
+                command(*args, **kwargs) for command, args, kwargs in self._commands
+            ]
+        self._commands = []
+        return results
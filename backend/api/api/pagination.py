@@ -0,0 +1,138 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Pages are addressed by the (created_at, id) of the row they continue from, so
+fetching page N is an index seek instead of an OFFSET scan over N pages.
+Cursors are signed with ``SECRET_KEY``; clients treat them as opaque strings.
+"""
+
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate a queryset newest first on ``(created_at, id)``.
+
+    Views can override ``ordering_field`` when the model names its timestamp
+    differently; the tie-breaker is always the primary key. The model needs a
+    composite index on both fields (see ``Product.Meta.indexes``).
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering_field = "created_at"
+    signing_salt = "api.pagination.KeysetPagination"
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor["reverse"]
+
+        field = self.ordering_field
+        if reverse:
+            queryset = queryset.order_by(field, "pk")
+        else:
+            queryset = queryset.order_by(f"-{field}", "-pk")
+
+        if cursor is not None:
+            # (field, pk) > / < (position, cursor pk), written with a leading
+            # range condition so the planner can seek the composite index.
+            position = parse_datetime(cursor["position"])
+            op = "gt" if reverse else "lt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{op}e": position}),
+                Q(**{f"{field}__{op}": position}) | Q(**{f"pk__{op}": cursor["pk"]}),
+            )
+
+        results = list(queryset[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = bool(results)
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None and bool(results)
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = signing.loads(token, salt=self.signing_salt)
+        except signing.BadSignature:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(cursor, dict) or not {"position", "pk", "reverse"} <= set(
+            cursor
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, instance, reverse):
+        token = signing.dumps(
+            {
+                "position": getattr(instance, self.ordering_field).isoformat(),
+                "pk": str(instance.pk),
+                "reverse": reverse,
+            },
+            salt=self.signing_salt,
+            compress=True,
+        )
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
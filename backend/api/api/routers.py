@@ -0,0 +1,139 @@
+"""
+Read replica routing.
+
+While a request is served, reads of the apps in ``REPLICA_READ_APPS`` go to
+one of ``DATABASE_REPLICAS``. Everything else stays on the primary:
+- writes, including ``select_for_update``, which Django routes as a write;
+- reads inside a transaction;
+- reads outside requests, such as Celery tasks and management commands;
+- reads by a request that has already written.
+
+A user who writes is also pinned to the primary for
+``READ_YOUR_WRITES_WINDOW`` seconds, so their next requests see their own
+changes despite replication lag. The pin is kept in ``api.kvstore``, keyed
+on the user that ``ClaimsJWTAuthentication`` binds to the request. Code that
+changes another user's data pins that user with ``pin_users``.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .kvstore import get_store
+
+
+PIN_KEY = "db:primary_pin:{user_id}"
+DEFAULT_WINDOW = 5
+
+_request = ContextVar("replica_routing_request", default=None)
+
+
+class RequestState:
+    def __init__(self):
+        self.user_id = None
+        self.wrote = False
+        # Whether the bound user is pinned, looked up once per request
+        self.pinned = None
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def get_window():
+    return getattr(settings, "READ_YOUR_WRITES_WINDOW", DEFAULT_WINDOW)
+
+
+def bind_user(user_id):
+    """Pin the current request's writes, and check its reads, for ``user_id``."""
+    state = _request.get()
+    if state is not None and state.user_id != user_id:
+        state.user_id = user_id
+        state.pinned = None
+
+
+def is_pinned(user_id):
+    return bool(get_store().exists(PIN_KEY.format(user_id=user_id)))
+
+
+def pin_users(user_ids):
+    """Read the data of ``user_ids`` from the primary for the next window."""
+    if not get_replicas():
+        return
+    window = max(1, int(get_window() * 1000))
+    with get_store().pipeline(transaction=False) as pipe:
+        for user_id in user_ids:
+            pipe.set(PIN_KEY.format(user_id=user_id), 1, px=window)
+        pipe.execute()
+
+
+def record_write():
+    state = _request.get()
+    if state is None or state.wrote:
+        return
+    state.wrote = True
+    if state.user_id is not None:
+        pin_users([state.user_id])
+
+
+def choose_read_database(user_id=None):
+    """
+    Return the alias to read from: a replica, or the primary when there is no
+    replica or no request, inside a transaction, or after a recent write by
+    the request's user or by ``user_id``.
+    """
+    replicas = get_replicas()
+    state = _request.get()
+    if not replicas or state is None or state.wrote:
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    if state.pinned is None:
+        state.pinned = state.user_id is not None and is_pinned(state.user_id)
+    if state.pinned:
+        return DEFAULT_DB_ALIAS
+    if user_id is not None and user_id != state.user_id and is_pinned(user_id):
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Related objects come from the database their instance came from
+            return instance._state.db
+        if model._meta.app_label in getattr(settings, "REPLICA_READ_APPS", []):
+            return choose_read_database()
+        return None
+
+    def db_for_write(self, model, **hints):
+        record_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Scope replica reads and read-your-writes stickiness to one request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request.set(RequestState())
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
@@ -14,6 +14,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
+from celery.schedules import crontab
 
 
 load_dotenv()
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
     "corsheaders",
     "users",
     "advertisements",
+    "blobs",
     "django_celery_results",
 ]
 
@@ -62,6 +64,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.routers.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "api.urls"
@@ -69,7 +72,7 @@ ROOT_URLCONF = "api.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [BASE_DIR / "templates"],
+        "DIRS": [BASE_DIR.parent / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -101,6 +104,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher hashes new passwords; the others can still verify old ones,
+# which are upgraded on the next login.
+PASSWORD_HASHERS = [
+    "users.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 1_000_000))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -119,6 +133,13 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Uploads larger than this are spooled to a temporary file instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Header-only image validation limits (api.validators)
+IMAGE_UPLOAD_MAX_DIMENSION = 10000
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -126,19 +147,25 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "api.throttling.AnonRateThrottle",
+        "api.throttling.UserRateThrottle",
+        "api.throttling.ScopedRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/day",
         "user": "1000/day",
+        "signup": "10/hour",
+        "login": "10/min",
+        "password_reset": "5/hour",
     },
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
 }
 
 SIMPLE_JWT = {
@@ -148,14 +175,121 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    # Revoked refresh tokens live in api.kvstore (see users.tokens)
+    "TOKEN_OBTAIN_SERIALIZER": "users.tokens.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.tokens.TokenRefreshSerializer",
 }
 
+# Shared store for counters and short-lived state (api.kvstore). Leave empty to
+# use a process-local stand-in (development only; production requires it).
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Read replicas (api.routers): aliases in DATABASES that mirror "default"
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ["api.routers.ReplicaRouter"]
+# Apps whose reads during a request may be served by a replica
+REPLICA_READ_APPS = ["advertisements"]
+# Seconds a user's reads stay on the primary after they write
+READ_YOUR_WRITES_WINDOW = int(os.getenv("READ_YOUR_WRITES_WINDOW", 5))
+
+# Seconds a full user loaded by ClaimsJWTAuthentication is reused per process
+CLAIMS_USER_CACHE_TIMEOUT = 30
+
+# Per-process cache in front of CACHES (see api.cache)
+CACHE_L1_TIMEOUT = 5
+CACHE_L1_MAX_ENTRIES = 1024
+# Seconds a cache miss waits for another process to compute the value
+CACHE_LOCK_WAIT = 2
+
+# Emails per second sent to the SMTP provider, across all workers (users.mail)
+EMAIL_RATE_LIMIT = int(os.getenv("EMAIL_RATE_LIMIT", 10))
+# Seconds a sent email is remembered to drop duplicates (api.idempotency)
+EMAIL_IDEMPOTENCY_TTL = 24 * 60 * 60
+# Seconds between runs of the email outbox dispatcher (users.outbox)
+EMAIL_OUTBOX_POLL_INTERVAL = int(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", 5))
+
+# Buffered product view counts (advertisements.counters)
+VIEW_COUNTER_FLUSH_INTERVAL = int(os.getenv("VIEW_COUNTER_FLUSH_INTERVAL", 30))
+VIEW_COUNTER_MAX_PENDING = 1000
+
 CELERY_BROKER_URL = "redis://localhost:6379/0"
-CELERY_RESULT_BACKEND = "django-db"
+# No task result is stored unless the task opts in with ignore_result=False.
+# Those go to Redis when REDIS_URL is set, else to the database.
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL or "django-db")
+CELERY_RESULT_EXPIRES = timedelta(days=1)
 CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Asia/Dhaka"
+CELERY_BEAT_SCHEDULE = {
+    "refresh-availability-indexes": {
+        "task": "advertisements.tasks.refresh_availability_indexes",
+        "schedule": crontab(hour=0, minute=5),
+    },
+    "flush-product-views": {
+        "task": "advertisements.tasks.flush_product_views",
+        "schedule": timedelta(seconds=VIEW_COUNTER_FLUSH_INTERVAL),
+    },
+    "reconcile-facet-counts": {
+        "task": "advertisements.tasks.reconcile_facet_counts",
+        "schedule": crontab(minute=15),
+    },
+    "dispatch-email-outbox": {
+        "task": "users.tasks.dispatch_email_outbox",
+        "schedule": timedelta(seconds=EMAIL_OUTBOX_POLL_INTERVAL),
+        # Runs queued while workers were down would only find nothing to do
+        "options": {"expires": EMAIL_OUTBOX_POLL_INTERVAL},
+    },
+    # Only finishes the previous release's queue; remove after 2026-11-17
+    "drain-email-queue": {
+        "task": "users.tasks.drain_email_queue",
+        "schedule": timedelta(minutes=1),
+    },
+    "prune-token-blacklist": {
+        "task": "users.tasks.prune_token_blacklist",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    # Replaces Celery's own cleanup of expired database results, which
+    # deletes them all in one statement.
+    "celery.backend_cleanup": {
+        "task": "api.tasks.purge_task_results",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "purge-auth-codes": {
+        "task": "users.tasks.purge_auth_codes",
+        "schedule": crontab(hour=4, minute=30),
+    },
+    "collect-orphaned-blobs": {
+        "task": "blobs.tasks.collect_orphaned_blobs",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
+
+# Number of days covered by each product's availability bitmap
+AVAILABILITY_HORIZON_DAYS = 400
+
+# Seconds an unreferenced media blob is kept before it is deleted
+MEDIA_BLOB_GRACE_PERIOD = 24 * 60 * 60
+
+# National ID scans (users.storage); must not be served by the web server
+PRIVATE_MEDIA_ROOT = os.getenv(
+    "PRIVATE_MEDIA_ROOT", BASE_DIR.parent / "private_media"
+)
 
 X_FRAME_OPTIONS = "DENY"
 SECURE_BROWSER_XSS_FILTER = True
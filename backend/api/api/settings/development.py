@@ -9,7 +9,13 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # A second database standing in for a read replica (api.routers). Reads
+    # only go to it when DATABASE_REPLICAS = ["replica"], as in the tests.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.replica.sqlite3",
+    },
 }
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
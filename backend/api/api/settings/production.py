@@ -1,10 +1,25 @@
 from .base import *
+import copy
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 DEBUG = False
 
-ALLOWED_HOSTS = env.list("ALLOWED_HOSTS")
+ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "").split(",")
+
+# The cache, throttles, token revocations, idempotency claims and
+# read-your-writes pins must be shared by every process; the process-local
+# fallbacks in base.py are for development only.
+if not REDIS_URL:
+    raise ImproperlyConfigured("REDIS_URL must be set in production.")
+
 
+# Database connections (api.db). With DB_POOL, each process keeps a psycopg
+# pool of DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE connections, which serves WSGI,
+# ASGI and Celery workers alike. Without it, each thread keeps its connection
+# for DB_CONN_MAX_AGE seconds; Django advises against that under ASGI.
+DB_POOL = os.environ.get("DB_POOL", "true").lower() in ("1", "true", "yes")
 
 DATABASES = {
     "default": {
@@ -16,6 +31,38 @@ DATABASES = {
         "PORT": os.environ.get("DB_PORT", "5432"),
     }
 }
+if DB_POOL:
+    # Ping a pooled connection before handing it out. Django builds the pool
+    # with check=ConnectionPool.check_connection from this flag; a "check"
+    # key in the pool options would be passed twice and raise TypeError.
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            # Seconds a request waits for a free connection before failing
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            # Seconds an idle connection above min_size is kept open
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+    # Check a persistent connection is alive when a request reuses it
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replicas (api.routers), e.g. DB_REPLICA_HOSTS=replica-1,replica-2. They
+# share the primary's credentials and pool settings.
+DB_REPLICA_HOSTS = os.environ.get("DB_REPLICA_HOSTS", "")
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, DB_REPLICA_HOSTS.split(","))):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
 
 # Email settings
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -0,0 +1,73 @@
+"""
+Database writes caused by Celery tasks.
+
+While a task runs in a worker, every INSERT, UPDATE and DELETE on any
+database connection is counted, including the result row written by a
+database result backend. Totals per task name are kept in ``api.kvstore``
+(``get_task_write_stats``) and each run is logged at debug level.
+"""
+
+import logging
+
+from celery.signals import task_postrun, task_prerun
+from django.db import connections
+
+from .kvstore import get_store
+
+
+logger = logging.getLogger(__name__)
+
+WRITES_KEY = "celery:task_db_writes"
+RUNS_KEY = "celery:task_runs"
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class WriteCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            self.count += len(params) if many and params is not None else 1
+        return execute(sql, params, many, context)
+
+
+_counters = {}
+
+
+@task_prerun.connect
+def start_counting(task_id=None, task=None, **kwargs):
+    counter = WriteCounter()
+    _counters[task_id] = counter
+    for connection in connections.all():
+        connection.execute_wrappers.append(counter)
+
+
+@task_postrun.connect
+def record_writes(task_id=None, task=None, **kwargs):
+    counter = _counters.pop(task_id, None)
+    if counter is None:
+        return
+    for connection in connections.all():
+        if counter in connection.execute_wrappers:
+            connection.execute_wrappers.remove(counter)
+
+    logger.debug(f"{task.name} [{task_id}] made {counter.count} database writes")
+    with get_store().pipeline(transaction=False) as pipe:
+        pipe.hincrby(WRITES_KEY, task.name, counter.count)
+        pipe.hincrby(RUNS_KEY, task.name, 1)
+        pipe.execute()
+
+
+def get_task_write_stats():
+    """Return ``{task name: (runs, database writes)}`` since the last reset."""
+    store = get_store()
+    writes = store.hgetall(WRITES_KEY)
+    return {
+        name.decode(): (int(runs), int(writes.get(name, 0)))
+        for name, runs in store.hgetall(RUNS_KEY).items()
+    }
+
+
+def reset_task_write_stats():
+    get_store().delete(WRITES_KEY, RUNS_KEY)
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from django_celery_results.models import TaskResult
+import logging
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_task_results(batch_size=1000):
+    """
+    Delete stored task results older than ``CELERY_RESULT_EXPIRES``.
+
+    Rows are deleted in batches of primary keys so that a large backlog
+    never holds long locks on the table.
+
+    Args:
+        batch_size: Number of rows deleted per query
+    """
+    retention = getattr(settings, "CELERY_RESULT_EXPIRES", None) or timedelta(days=1)
+    expired = TaskResult.objects.filter(
+        date_done__lt=timezone.now() - retention
+    ).order_by()
+
+    deleted = 0
+    while True:
+        pks = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        deleted += TaskResult.objects.filter(pk__in=pks).delete()[0]
+
+    logger.info(f"Purged {deleted} task results")
+    return deleted
@@ -0,0 +1,96 @@
+"""
+Sliding-window throttles backed by the shared key-value store.
+
+DRF's throttles keep a list of request timestamps per client in the default
+cache and rewrite it on every request. These keep one counter per client and
+fixed window in ``api.kvstore`` instead. The rate over the last ``duration``
+seconds is estimated from the current window's count plus the previous
+window's count, weighted by how much of it still overlaps the sliding window.
+
+Each request is one pipelined round trip: INCR and EXPIRE the current window,
+and GET the previous one. Every worker shares the same counters, so a limit
+holds for the whole cluster.
+"""
+
+import math
+
+from rest_framework import throttling
+
+from .kvstore import get_store
+
+
+class SlidingWindowMixin:
+    """
+    Replaces the timestamp history of a ``SimpleRateThrottle`` with two
+    window counters. ``get_cache_key`` is unchanged.
+    """
+
+    key_prefix = "throttle"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        window = int(window)
+        current_key = f"{self.key_prefix}:{self.key}:{window}"
+        previous_key = f"{self.key_prefix}:{self.key}:{window - 1}"
+
+        with get_store().pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, 2 * self.duration)
+            pipe.get(previous_key)
+            current, _, previous = pipe.execute()
+
+        self.current = int(current)
+        self.previous = int(previous or 0)
+        self.elapsed = offset / self.duration
+        return self.estimate() <= self.num_requests
+
+    def estimate(self):
+        return self.previous * (1 - self.elapsed) + self.current
+
+    def wait(self):
+        """
+        Seconds until a retry would be allowed. Rejected requests are counted
+        too, so the retry itself is one more request in the current window.
+        """
+        if self.current < self.num_requests and self.previous:
+            # previous * (1 - elapsed) + current + 1 <= num_requests
+            needed = 1 - (self.num_requests - self.current - 1) / self.previous
+            return max(0, self.seconds(needed - self.elapsed))
+        # Not before the next window, where this one becomes the previous:
+        # current * (1 - elapsed) + 1 <= num_requests
+        needed = max(0, 1 - (self.num_requests - 1) / self.current)
+        return self.seconds(1 - self.elapsed + needed)
+
+    def seconds(self, fraction):
+        # Rounded first so float error cannot push an exact second up by one
+        return math.ceil(round(fraction * self.duration, 6))
+
+
+class AnonRateThrottle(SlidingWindowMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowMixin, throttling.UserRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(SlidingWindowMixin, throttling.ScopedRateThrottle):
+    """Throttles views that set ``throttle_scope``; other views are not limited."""
+
+    def allow_request(self, request, view):
+        # DRF resolves the scope in ScopedRateThrottle.allow_request, which
+        # the mixin overrides.
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .views import DatabasePoolStatsView
 
 urlpatterns = [
     # Authemail endpoints
@@ -8,4 +9,6 @@ urlpatterns = [
     # JWT endpoints
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    # Operational endpoints
+    path("health/db/pools/", DatabasePoolStatsView.as_view(), name="db_pool_stats"),
 ]
@@ -0,0 +1,103 @@
+"""
+Upload validation shared by the ``users`` and ``advertisements`` apps.
+
+Images are checked from their headers only. The real format is sniffed from
+the first bytes instead of trusting the client's ``content_type``. Pillow then
+reads the dimensions without decoding any pixels, so decompression bombs and
+absurd dimensions are rejected before anything large is allocated. Uploads
+above ``FILE_UPLOAD_MAX_MEMORY_SIZE`` are spooled to disk by Django and
+streamed to storage in chunks; nothing here reads a file into memory.
+"""
+
+import warnings
+
+from django.conf import settings
+from django.utils.translation import gettext as _
+from PIL import Image
+from rest_framework.serializers import ValidationError
+
+
+# Leading bytes of each accepted format
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+SNIFF_BYTES = 16
+
+DEFAULT_MAX_PIXELS = 40_000_000
+DEFAULT_MAX_DIMENSION = 10_000
+
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+
+def sniff_image_format(file):
+    """Return ``"jpeg"``, ``"png"``, ``"gif"``, ``"webp"`` or ``None``."""
+    _rewind(file)
+    head = file.read(SNIFF_BYTES)
+    _rewind(file)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, image_format in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    return None
+
+
+def read_image_size(file):
+    """
+    Return ``(width, height)`` from the image header. Pillow parses the
+    header lazily; pixel data is never decoded here.
+    """
+    _rewind(file)
+    try:
+        with warnings.catch_warnings():
+            # Our own pixel limit applies; don't let Pillow warn or raise
+            # halfway through the header.
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with Image.open(file) as image:
+                return image.size
+    except Image.DecompressionBombError:
+        raise ValidationError(_("Image dimensions are too large."))
+    except Exception:
+        raise ValidationError(_("Invalid image format."))
+    finally:
+        _rewind(file)
+
+
+def validate_image_upload(
+    file, allowed_formats, max_size, size_message=None, format_message=None
+):
+    """
+    Validate an uploaded image without decoding it.
+
+    Args:
+        file: UploadedFile (or any seekable file object with ``size``)
+        allowed_formats: Accepted formats, e.g. ``{"jpeg", "png"}``
+        max_size: Maximum size in bytes
+        size_message: Error raised when the file is too large
+        format_message: Error raised when the format is not accepted
+
+    Returns:
+        ``(image_format, width, height)``
+    """
+    if file.size > max_size:
+        raise ValidationError(size_message or _("Image file is too large."))
+
+    image_format = sniff_image_format(file)
+    if image_format not in allowed_formats:
+        raise ValidationError(format_message or _("Invalid image format."))
+
+    width, height = read_image_size(file)
+    max_dimension = getattr(
+        settings, "IMAGE_UPLOAD_MAX_DIMENSION", DEFAULT_MAX_DIMENSION
+    )
+    max_pixels = getattr(settings, "IMAGE_UPLOAD_MAX_PIXELS", DEFAULT_MAX_PIXELS)
+    if max(width, height) > max_dimension or width * height > max_pixels:
+        raise ValidationError(_("Image dimensions are too large."))
+
+    return image_format, width, height
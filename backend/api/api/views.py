@@ -0,0 +1,18 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db import get_pool_stats
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    Connection pool statistics of the process that serves the request.
+    Each web worker has its own pools, so repeated calls may be answered by
+    different workers.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(get_pool_stats())
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class BlobsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "blobs"
+
+    def ready(self):
+        from .signals import connect_reference_counting
+
+        connect_reference_counting()
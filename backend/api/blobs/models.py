@@ -0,0 +1,29 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class MediaBlob(models.Model):
+    """
+    One stored file of the content-addressed media storage, shared by every
+    model field that points at the same content.
+    """
+
+    name = models.CharField(
+        max_length=255, primary_key=True, help_text=_("Storage name (content hash)")
+    )
+    size = models.PositiveBigIntegerField(help_text=_("Size in bytes"))
+    ref_count = models.IntegerField(
+        default=0, help_text=_("Number of model fields referencing this blob")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ref_count", "updated_at"]),
+        ]
+        verbose_name = _("Media Blob")
+        verbose_name_plural = _("Media Blobs")
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
@@ -0,0 +1,74 @@
+"""
+Reference counting for ``MediaBlob``.
+
+Every model file field backed by the content-addressed storage is tracked:
+the stored name is remembered when an instance is loaded, and on save or
+delete the old and new blobs are adjusted in the same transaction.
+"""
+
+from django.apps import apps
+from django.db.models import FileField
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .storage import ContentAddressedStorage, adjust_references
+
+
+def tracked_fields(model):
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+        and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def _names(instance, fields):
+    names = {}
+    deferred = instance.get_deferred_fields()
+    for field in fields:
+        if field.attname in deferred:
+            continue
+        value = instance.__dict__.get(field.attname)
+        names[field.attname] = getattr(value, "name", value) or None
+    return names
+
+
+def connect_reference_counting():
+    for model in apps.get_models():
+        fields = tracked_fields(model)
+        if not fields:
+            continue
+
+        def remember_blobs(sender, instance, fields=fields, **kwargs):
+            instance._blob_names = _names(instance, fields)
+
+        def count_blob_references(
+            sender, instance, created, fields=fields, **kwargs
+        ):
+            previous = getattr(instance, "_blob_names", {})
+            current = _names(instance, fields)
+            added, removed = [], []
+            for attname, name in current.items():
+                old = None if created else previous.get(attname)
+                if name == old:
+                    continue
+                if name:
+                    added.append(name)
+                if old:
+                    removed.append(old)
+            adjust_references(added, 1)
+            adjust_references(removed, -1)
+            instance._blob_names = current
+
+        def release_blob_references(sender, instance, fields=fields, **kwargs):
+            names = getattr(instance, "_blob_names", None) or _names(instance, fields)
+            adjust_references([name for name in names.values() if name], -1)
+
+        uid = f"blobs:{model._meta.label}"
+        post_init.connect(remember_blobs, sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(
+            count_blob_references, sender=model, weak=False, dispatch_uid=uid
+        )
+        post_delete.connect(
+            release_blob_references, sender=model, weak=False, dispatch_uid=uid
+        )
@@ -0,0 +1,103 @@
+"""
+Content-addressed media storage.
+
+Files are named after the SHA-256 of their content, so uploading the same
+photo twice (for another listing, or as a profile picture) stores it once.
+Names never change meaning, so the web server can serve ``MEDIA_URL/blobs/``
+with ``Cache-Control: public, max-age=31536000, immutable``.
+
+The ``upload_to`` of the field is ignored: the directory is derived from the
+hash. Files saved before a field switched to this storage keep their names
+and are never counted or collected.
+
+Every stored blob gets a ``MediaBlob`` row. The reference counts on it are
+maintained by ``blobs.signals`` and consumed by the garbage collector in
+``blobs.tasks``. A blob may be shared by several rows, so ``delete`` (called
+by ``FieldFile.delete``) keeps the file: the row's reference is released
+when it is saved without the file, and only the collector removes blobs.
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+
+BLOB_PREFIX = "blobs"
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(digest, original_name):
+    extension = os.path.splitext(original_name)[1].lower()
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, **kwargs):
+        # Identical names mean identical content, so losing a race to write
+        # the same blob is harmless.
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def save(self, name, content, max_length=None):
+        from .models import MediaBlob
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            from django.core.files import File
+
+            content = File(content, name)
+
+        name = blob_name(content_hash(content), name)
+        # The row lock makes the garbage collector wait until the blob has
+        # been written, and keeps it from deleting a file just reused here.
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                name=name, defaults={"size": content.size}
+            )
+            if not self.exists(name):
+                super().save(name, content, max_length=max_length)
+            if not created:
+                blob.save(update_fields=["updated_at"])
+        return name
+
+    def delete(self, name):
+        if not self.is_blob(name):
+            super().delete(name)
+
+    def delete_blob(self, name):
+        """Remove a blob's file. Only for the garbage collector."""
+        super().delete(name)
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(f"{BLOB_PREFIX}/")
+
+
+media_storage = ContentAddressedStorage()
+
+
+def get_media_storage():
+    return media_storage
+
+
+def adjust_references(names, delta):
+    from .models import MediaBlob
+
+    names = [name for name in names if media_storage.is_blob(name)]
+    if names:
+        MediaBlob.objects.filter(name__in=names).update(
+            ref_count=F("ref_count") + delta
+        )
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MediaBlob
+from .signals import tracked_fields
+from .storage import media_storage
+import logging
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+
+def count_references(names):
+    """Return ``{name: references}`` by querying every tracked field."""
+    counts = dict.fromkeys(names, 0)
+    for model in apps.get_models():
+        for field in tracked_fields(model):
+            rows = (
+                model._base_manager.filter(**{f"{field.name}__in": names})
+                .values_list(field.attname, flat=True)
+            )
+            for name in rows:
+                counts[name] += 1
+    return counts
+
+
+@shared_task
+def collect_orphaned_blobs(batch_size=500):
+    """
+    Delete blobs that no model field references any more.
+
+    Only blobs whose count dropped to zero at least
+    ``MEDIA_BLOB_GRACE_PERIOD`` ago are considered, so an upload whose model
+    row is still being saved is never collected. The references are counted
+    again before deleting; counts that drifted are repaired instead.
+
+    Args:
+        batch_size: Number of blobs checked per query
+    """
+    grace = timedelta(
+        seconds=getattr(settings, "MEDIA_BLOB_GRACE_PERIOD", 24 * 60 * 60)
+    )
+    candidates = MediaBlob.objects.filter(
+        ref_count__lte=0, updated_at__lt=timezone.now() - grace
+    ).order_by("name")
+
+    deleted = repaired = 0
+    last_name = None
+    while True:
+        batch = candidates if last_name is None else candidates.filter(
+            name__gt=last_name
+        )
+        names = list(batch.values_list("name", flat=True)[:batch_size])
+        if not names:
+            break
+        last_name = names[-1]
+
+        with transaction.atomic():
+            # Lock the rows so a concurrent upload of the same content waits
+            # for this batch instead of reusing a file about to be deleted.
+            locked = list(
+                MediaBlob.objects.select_for_update()
+                .filter(name__in=names, ref_count__lte=0)
+                .values_list("name", flat=True)
+            )
+            counts = count_references(locked)
+            orphans = [name for name, count in counts.items() if count == 0]
+            for name, count in counts.items():
+                if count:
+                    MediaBlob.objects.filter(name=name).update(ref_count=count)
+                    repaired += 1
+            for name in orphans:
+                media_storage.delete_blob(name)
+            MediaBlob.objects.filter(name__in=orphans).delete()
+            deleted += len(orphans)
+
+    if repaired:
+        logger.warning(f"Repaired reference counts of {repaired} media blobs")
+    logger.info(f"Deleted {deleted} orphaned media blobs")
+    return deleted
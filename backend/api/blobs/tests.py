@@ -0,0 +1,49 @@
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from api.benchmarks import create_bench_user
+
+from .models import MediaBlob
+from .storage import media_storage
+from .tasks import collect_orphaned_blobs
+
+
+@override_settings(MEDIA_BLOB_GRACE_PERIOD=0)
+class SharedBlobTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+        self.first, self.second = create_bench_user(), create_bench_user()
+        for user in (self.first, self.second):
+            user.profile_picture.save("photo.png", ContentFile(b"same pixels"))
+        self.name = self.first.profile_picture.name
+
+    def ref_count(self):
+        return MediaBlob.objects.get(name=self.name).ref_count
+
+    def test_rows_share_one_blob(self):
+        self.assertEqual(self.second.profile_picture.name, self.name)
+        self.assertEqual(self.ref_count(), 2)
+
+    def test_deleting_one_reference_keeps_the_file(self):
+        self.first.profile_picture.delete()
+
+        self.assertEqual(self.ref_count(), 1)
+        self.assertEqual(collect_orphaned_blobs(), 0)
+        self.assertTrue(media_storage.exists(self.name))
+        with self.second.profile_picture.open("rb") as picture:
+            self.assertEqual(picture.read(), b"same pixels")
+
+    def test_collector_removes_the_file_after_the_last_reference(self):
+        self.first.profile_picture.delete()
+        self.second.delete()
+
+        self.assertEqual(self.ref_count(), 0)
+        self.assertTrue(media_storage.exists(self.name))
+        self.assertEqual(collect_orphaned_blobs(), 1)
+        self.assertFalse(media_storage.exists(self.name))
+        self.assertFalse(MediaBlob.objects.filter(name=self.name).exists())
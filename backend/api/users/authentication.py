@@ -0,0 +1,125 @@
+"""
+JWT authentication from token claims.
+
+``ClaimsJWTAuthentication`` trusts the signed claims of a valid access token
+instead of loading the user on every request. ``request.user`` is a
+``ClaimsUser``: the user id and the fields in ``users.tokens.USER_CLAIMS``
+are answered from the token, and anything else loads the full ``User``
+transparently, from a short-lived per-process cache when possible. That copy
+may be stale, so views that save the user reload it first
+(``users.views.lock_request_user``).
+
+Deactivating a user or changing a claimed field takes effect when their
+access token is next refreshed, at most ``ACCESS_TOKEN_LIFETIME`` later.
+"""
+
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from api.cache import LocalCache
+from api.routers import bind_user
+from .tokens import USER_CLAIMS
+
+
+user_cache = LocalCache(max_entries=1024)
+
+
+def load_user(user_id):
+    """Return the user ``user_id``, from the per-process cache if possible."""
+    user = user_cache.get(user_id)
+    if user is LocalCache.MISSING:
+        try:
+            user = get_user_model().objects.get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        user_cache.set(
+            user_id, user, getattr(settings, "CLAIMS_USER_CACHE_TIMEOUT", 30)
+        )
+    # Views may modify and save request.user; never hand out the cached
+    # instance itself.
+    return copy.copy(user)
+
+
+def forget_user(user_id):
+    user_cache.delete(user_id)
+
+
+def _claimed(name):
+    def get(self):
+        if self._wrapped is empty and name in self._claims:
+            return self._claims[name]
+        return getattr(self.user, name)
+
+    return property(get)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    The authenticated user, loaded only when a view needs more than its
+    token claims. Setting an attribute loads the user and sets it there.
+    """
+
+    def __init__(self, user_id, claims):
+        self.__dict__["_claims"] = claims
+        self.__dict__["_user_id"] = user_id
+        super().__init__(lambda: load_user(user_id))
+
+    @property
+    def user(self):
+        if self._wrapped is empty:
+            self._setup()
+        return self._wrapped
+
+    @property
+    def __class__(self):
+        return get_user_model()
+
+    @property
+    def pk(self):
+        return self._user_id
+
+    id = pk
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __repr__(self):
+        return f"<ClaimsUser: {self.pk}>"
+
+
+for _name in USER_CLAIMS:
+    setattr(ClaimsUser, _name, _claimed(_name))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        claims = {
+            claim: validated_token[claim]
+            for claim in USER_CLAIMS
+            if claim in validated_token
+        }
+        user_id = get_user_model()._meta.pk.to_python(user_id)
+        # Key the request's read-your-writes stickiness on this user
+        bind_user(user_id)
+        return ClaimsUser(user_id, claims)
@@ -0,0 +1,48 @@
+"""
+Cached user profiles.
+
+Profiles are cached through ``api.cache``. Saving a ``User`` invalidates its
+profile once the transaction commits (see ``users.signals``); code that
+changes users with queryset ``update()`` calls ``invalidate_profiles``.
+Invalidated users are also pinned to the primary (``api.routers``), so the
+profile rebuilt after a change made by someone else is not read from a
+lagging replica.
+"""
+
+from django.db import transaction
+
+from api.cache import bump_version, get_or_compute
+from api.routers import choose_read_database, pin_users
+
+
+PROFILE_TIMEOUT = 60 * 15
+
+
+def profile_namespace(user_id):
+    return f"users:profile:{user_id}"
+
+
+def get_cached_profile(user_id):
+    from .models import User
+    from .serializers import UserProfileSerializer
+
+    def serialize():
+        # Read from a replica unless the user wrote recently, so their own
+        # changes are not cached over with an older copy.
+        user = User.objects.using(choose_read_database(user_id)).get(pk=user_id)
+        return dict(UserProfileSerializer(user).data)
+
+    return get_or_compute(profile_namespace(user_id), serialize, PROFILE_TIMEOUT)
+
+
+def invalidate_profiles(user_ids):
+    user_ids = list(user_ids)
+
+    def bump():
+        # Whoever wrote, the next miss must not cache a lagging replica's
+        # copy under the new version.
+        pin_users(user_ids)
+        for user_id in user_ids:
+            bump_version(profile_namespace(user_id))
+
+    transaction.on_commit(bump)
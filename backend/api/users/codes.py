@@ -0,0 +1,79 @@
+"""
+Retention of authemail's signup and password reset codes.
+
+authemail deletes a code when it is used, but codes that are never used stay
+forever. ``purge_codes`` deletes password reset codes that authemail no
+longer accepts and signup codes whose user is already verified. Signup codes
+of unverified users never expire: signing up again with the same email is
+rejected, so the code is the user's only way to verify. Codes of deleted
+users go with them (``on_delete=CASCADE``). The purge runs daily from the
+``purge_auth_codes`` beat task and on demand from the ``purge_auth_codes``
+management command.
+
+Rows are deleted in small batches of primary keys, each in its own
+statement, so a large backlog never holds long locks. Expired password reset
+codes are found through an index on ``created_at`` (migration
+``users.0006``). Totals of rows removed are kept in ``api.kvstore``
+(``get_code_purge_stats``).
+"""
+
+from datetime import timedelta
+
+from authemail.models import EXPIRY_PERIOD, PasswordResetCode, SignupCode
+from django.utils import timezone
+
+from api.kvstore import get_store
+
+
+PURGE_BATCH_SIZE = 1000
+# authemail accepts a password reset code while its age in calendar days is
+# at most EXPIRY_PERIOD, so one more day never deletes a usable code.
+PASSWORD_RESET_CODE_RETENTION = timedelta(days=EXPIRY_PERIOD + 1)
+STATS_KEY = "users:code_purge"
+
+
+def _purge(queryset, batch_size):
+    model = queryset.model
+    queryset = queryset.order_by()
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += model.objects.filter(pk__in=pks).delete()[0]
+
+
+def purge_codes(batch_size=PURGE_BATCH_SIZE, now=None):
+    """
+    Delete expired and consumed codes.
+
+    Returns ``{model label: rows deleted}``.
+    """
+    cutoff = (now or timezone.now()) - PASSWORD_RESET_CODE_RETENTION
+    deleted = {
+        SignupCode._meta.label: _purge(
+            SignupCode.objects.filter(user__is_verified=True), batch_size
+        ),
+        PasswordResetCode._meta.label: _purge(
+            PasswordResetCode.objects.filter(created_at__lt=cutoff), batch_size
+        ),
+    }
+
+    with get_store().pipeline(transaction=False) as pipe:
+        for label, count in deleted.items():
+            pipe.hincrby(STATS_KEY, label, count)
+        pipe.hincrby(STATS_KEY, "runs", 1)
+        pipe.execute()
+    return deleted
+
+
+def get_code_purge_stats():
+    """Return ``{model label or "runs": total}`` since the last reset."""
+    return {
+        name.decode(): int(total)
+        for name, total in get_store().hgetall(STATS_KEY).items()
+    }
+
+
+def reset_code_purge_stats():
+    get_store().delete(STATS_KEY)
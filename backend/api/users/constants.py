@@ -0,0 +1,12 @@
+from django.utils.translation import gettext_lazy as _
+
+# Transactional emails, rendered by users.emails
+EMAIL_KIND_CHOICES = [
+    ("signup", _("Email verification")),
+    ("password_reset", _("Password reset")),
+]
+
+OUTBOX_STATUS_CHOICES = [
+    ("pending", _("Pending")),
+    ("failed", _("Failed")),
+]
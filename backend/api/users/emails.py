@@ -0,0 +1,107 @@
+"""
+Rendering of the transactional emails sent by ``users.tasks``.
+
+The subject, text and HTML templates of each email are loaded and compiled
+once per process and rendered from one shared context. The code is loaded
+together with its user (``select_related``), so rendering runs no queries.
+``build_*_emails`` render many messages for a batched send, keyed by code.
+"""
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template import Context
+from django.template.loader import get_template
+
+from authemail.models import PasswordResetCode, SignupCode
+
+
+EMAIL_TEMPLATES = {
+    "signup": (
+        "authemail/signup_email_subject.txt",
+        "authemail/signup_email.txt",
+        "authemail/signup_email.html",
+    ),
+    "password_reset": (
+        "authemail/password_reset_email_subject.txt",
+        "authemail/password_reset_email.txt",
+        "authemail/password_reset_email.html",
+    ),
+}
+
+_compiled = {}
+
+
+def get_templates(kind):
+    """Return the compiled ``(subject, text, html)`` templates of ``kind``."""
+    templates = _compiled.get(kind)
+    if templates is None:
+        # The engine-independent wrapper builds a new Context per render;
+        # keep the underlying Django templates to share one.
+        templates = tuple(
+            get_template(name).template for name in EMAIL_TEMPLATES[kind]
+        )
+        _compiled[kind] = templates
+    return templates
+
+
+def render_email(kind, context, to):
+    subject, text, html = get_templates(kind)
+    context = Context(context)
+    message = EmailMultiAlternatives(
+        subject=" ".join(subject.render(context).split()),
+        body=text.render(context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=to,
+    )
+    message.attach_alternative(html.render(context), "text/html")
+    return message
+
+
+def get_frontend_url():
+    return getattr(settings, "FRONTEND_URL", "http://localhost:3000")
+
+
+def signup_email(signup_code):
+    frontend_url = get_frontend_url()
+    return render_email(
+        "signup",
+        {
+            "user": signup_code.user,
+            "verification_url": f"{frontend_url}/verify-email?code={signup_code.code}",
+            "frontend_url": frontend_url,
+            "code": signup_code.code,
+        },
+        to=[signup_code.user.email],
+    )
+
+
+def password_reset_email(reset_code):
+    frontend_url = get_frontend_url()
+    return render_email(
+        "password_reset",
+        {
+            "user": reset_code.user,
+            "reset_url": f"{frontend_url}/reset-password?code={reset_code.code}",
+            "frontend_url": frontend_url,
+            "code": reset_code.code,
+        },
+        to=[reset_code.user.email],
+    )
+
+
+def build_signup_emails(codes):
+    """Render the verification emails of ``codes`` with a single query."""
+    signup_codes = SignupCode.objects.select_related("user").filter(code__in=codes)
+    return {
+        signup_code.code: signup_email(signup_code) for signup_code in signup_codes
+    }
+
+
+def build_password_reset_emails(codes):
+    """Render the password reset emails of ``codes`` with a single query."""
+    reset_codes = PasswordResetCode.objects.select_related("user").filter(
+        code__in=codes
+    )
+    return {
+        reset_code.code: password_reset_email(reset_code) for reset_code in reset_codes
+    }
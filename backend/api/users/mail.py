@@ -0,0 +1,168 @@
+"""
+Email delivery for Celery workers.
+
+Tasks hand rendered messages to ``enqueue``. Queued messages are kept in a
+list in ``api.kvstore`` and sent by ``drain`` in batches over one SMTP
+connection per worker process. The connection stays open between batches
+and is re-opened when the server has dropped it.
+
+Sending is rate limited per provider (``EMAIL_HOST``) across all workers to
+``EMAIL_RATE_LIMIT`` messages per second.
+"""
+
+import json
+import smtplib
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core import mail
+
+from api.kvstore import get_store
+import logging
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+
+QUEUE_KEY = "users:mail_queue"
+DRAIN_BATCH_SIZE = 50
+# Errors after which the connection is unusable and worth one reconnect
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+_connection = None
+_connection_lock = threading.RLock()
+
+
+def serialize(message):
+    return json.dumps(
+        {
+            "subject": message.subject,
+            "body": message.body,
+            "from_email": message.from_email,
+            "to": message.to,
+            "cc": message.cc,
+            "bcc": message.bcc,
+            "reply_to": message.reply_to,
+            "headers": message.extra_headers,
+            "alternatives": [
+                [content, mimetype]
+                for content, mimetype in getattr(message, "alternatives", [])
+            ],
+        }
+    )
+
+
+def deserialize(data):
+    fields = json.loads(data)
+    alternatives = fields.pop("alternatives")
+    message = mail.EmailMultiAlternatives(**fields)
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+def enqueue(*messages):
+    """Queue ``messages`` for the next ``drain``."""
+    get_store().rpush(QUEUE_KEY, *(serialize(message) for message in messages))
+
+
+def pending():
+    return get_store().llen(QUEUE_KEY)
+
+
+def get_connection():
+    """Return this process's email connection, opened if necessary."""
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = mail.get_connection(fail_silently=False)
+        # Opening an open SMTP connection is a no-op. Because the
+        # connection is opened here rather than by send_messages, the
+        # backend leaves it open afterwards.
+        _connection.open()
+        return _connection
+
+
+def close_connection():
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            return
+        try:
+            _connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+        _connection = None
+
+
+@worker_process_shutdown.connect
+def close_connection_on_shutdown(**kwargs):
+    close_connection()
+
+
+def provider():
+    return getattr(settings, "EMAIL_HOST", None) or "default"
+
+
+def wait_for_send_slot():
+    """Block until the provider's per-second budget has room for a message."""
+    limit = getattr(settings, "EMAIL_RATE_LIMIT", None)
+    if not limit:
+        return
+    store = get_store()
+    while True:
+        now = time.time()
+        key = f"users:mail_rate:{provider()}:{int(now)}"
+        with store.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, 2)
+            sent, _ = pipe.execute()
+        if int(sent) <= limit:
+            return
+        time.sleep(int(now) + 1 - now)
+
+
+def send(message):
+    """
+    Send one message over the shared connection, reconnecting once if the
+    server dropped it.
+    """
+    with _connection_lock:
+        for attempt in range(2):
+            try:
+                return get_connection().send_messages([message])
+            except CONNECTION_ERRORS:
+                close_connection()
+                if attempt:
+                    raise
+                logger.info("Email connection lost, reconnecting")
+
+
+def drain(batch_size=DRAIN_BATCH_SIZE):
+    """
+    Send queued messages in batches until the queue is empty.
+
+    A message the server rejects is logged and dropped. If the connection
+    cannot be re-established, the unsent part of the batch is put back at
+    the end of the queue and the error is raised.
+
+    Returns the number of messages sent.
+    """
+    store = get_store()
+    sent = 0
+    while True:
+        batch = store.lpop(QUEUE_KEY, batch_size)
+        if not batch:
+            return sent
+        for index, data in enumerate(batch):
+            message = deserialize(data)
+            wait_for_send_slot()
+            try:
+                sent += send(message) or 0
+            except CONNECTION_ERRORS:
+                store.rpush(QUEUE_KEY, *batch[index:])
+                raise
+            except smtplib.SMTPException as e:
+                logger.error(f"Email to {message.to} rejected: {e}")
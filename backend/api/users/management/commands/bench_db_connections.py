@@ -0,0 +1,101 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+
+from api.benchmarks import percentile
+from api.db import get_pool_stats
+
+
+# label: (CONN_MAX_AGE, pooled). CONN_MAX_AGE=0 without a pool connects and
+# authenticates on every request.
+MODES = {
+    "new connection": (0, False),
+    "persistent": (60, False),
+    "pool": (0, True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second with a new database connection per "
+        "request, persistent connections and a connection pool. Needs "
+        "PostgreSQL; point DB_HOST at a local server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=8)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("This benchmark needs a PostgreSQL database.")
+
+        settings_dict = connections.settings["default"]
+        original = {
+            key: settings_dict.get(key) for key in ("CONN_MAX_AGE", "OPTIONS")
+        }
+        options_without_pool = {
+            key: value
+            for key, value in (original["OPTIONS"] or {}).items()
+            if key != "pool"
+        }
+        threads = options["threads"]
+        per_thread = max(1, options["requests"] // threads)
+        try:
+            for label, (conn_max_age, pooled) in MODES.items():
+                self._reset()
+                settings_dict["CONN_MAX_AGE"] = conn_max_age
+                settings_dict["OPTIONS"] = dict(options_without_pool)
+                if pooled:
+                    settings_dict["OPTIONS"]["pool"] = {
+                        "min_size": threads,
+                        "max_size": threads,
+                    }
+                latencies, elapsed = self._run(threads, per_thread)
+                self.stdout.write(
+                    f"{label}: {len(latencies) / elapsed:.0f} requests/s, "
+                    f"p50 {percentile(latencies, 50) * 1000:.2f} ms, "
+                    f"p99 {percentile(latencies, 99) * 1000:.2f} ms"
+                )
+            for alias, stats in get_pool_stats().items():
+                self.stdout.write(f"Pool {alias}: {stats}")
+        finally:
+            self._reset()
+            settings_dict.update(original)
+
+    def _reset(self):
+        connections.close_all()
+        if connection.pool:
+            connection.close_pool()
+
+    def _run(self, threads, per_thread):
+        latencies = []
+        barrier = threading.Barrier(threads + 1)
+
+        def worker():
+            User = get_user_model()
+            samples = []
+            barrier.wait()
+            for _ in range(per_thread):
+                start = time.perf_counter()
+                # The same signals Django sends around every request; they
+                # close or return the connection according to the settings.
+                request_started.send(sender=self.__class__)
+                User.objects.order_by("pk").first()
+                request_finished.send(sender=self.__class__)
+                samples.append(time.perf_counter() - start)
+            latencies.extend(samples)
+            connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return latencies, time.perf_counter() - start
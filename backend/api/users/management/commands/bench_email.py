@@ -0,0 +1,106 @@
+import socketserver
+import threading
+import time
+
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from users import mail
+
+
+class SMTPSink(socketserver.StreamRequestHandler):
+    """Accepts every message and discards it. Enough SMTP for Django's backend."""
+
+    connect_delay = 0
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        # Stands in for the TCP and TLS handshakes of a real provider
+        time.sleep(self.connect_delay)
+        self.reply("220 localhost bench")
+        while line := self.rfile.readline():
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command == "DATA":
+                self.reply("354 end with .")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.received += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    received = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare messages per second of one SMTP connection per email with "
+        "the batched users.mail queue, against a local SMTP sink."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=500)
+        parser.add_argument(
+            "--connect-delay",
+            type=float,
+            default=50,
+            help="Milliseconds the sink waits before greeting a new connection",
+        )
+        parser.add_argument("--rate-limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        SMTPSink.connect_delay = options["connect_delay"] / 1000
+        server = SMTPServer(("127.0.0.1", 0), SMTPSink)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        count = options["messages"]
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_RATE_LIMIT=options["rate_limit"],
+        ):
+            start = time.perf_counter()
+            for i in range(count):
+                self._message(i).send(fail_silently=False)
+            per_message = time.perf_counter() - start
+
+            start = time.perf_counter()
+            mail.enqueue(*(self._message(i) for i in range(count)))
+            sent = mail.drain()
+            mail.close_connection()
+            batched = time.perf_counter() - start
+
+        server.shutdown()
+        self.stdout.write(
+            f"Connection per email: {count / per_message:.0f} messages/s"
+        )
+        self.stdout.write(
+            f"Batched queue: {count / batched:.0f} messages/s ({sent} sent)"
+        )
+        self.stdout.write(f"Sink received {server.received} messages")
+
+    def _message(self, i):
+        message = EmailMultiAlternatives(
+            subject=f"Bench message {i}",
+            body="Plain text body",
+            from_email="noreply@example.com",
+            to=[f"bench_{i}@example.com"],
+        )
+        message.attach_alternative("<p>HTML body</p>", "text/html")
+        return message
@@ -0,0 +1,78 @@
+from authemail.models import SignupCode
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from api.benchmarks import QueryCounter, create_bench_user, rolled_back, timer
+from users.emails import build_signup_emails, signup_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare renders per second of the verification email with "
+        "render_to_string per part, with users.emails, and with its bulk "
+        "mode. Runs in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--emails", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = options["emails"]
+        results = {}
+        with rolled_back():
+            codes = [
+                SignupCode.objects.create_signup_code(create_bench_user(), "127.0.0.1").code
+                for _ in range(count)
+            ]
+            # Warm the template loaders so every variant starts compiled
+            signup_email(SignupCode.objects.select_related("user").get(code=codes[0]))
+
+            with QueryCounter() as former_queries, timer(results, "former"):
+                for code in codes:
+                    self._former_render(SignupCode.objects.get(code=code))
+
+            with QueryCounter() as single_queries, timer(results, "single"):
+                for code in codes:
+                    signup_email(
+                        SignupCode.objects.select_related("user").get(code=code)
+                    )
+
+            with QueryCounter() as bulk_queries, timer(results, "bulk"):
+                messages = build_signup_emails(codes)
+
+        if len(messages) != count:
+            self.stderr.write(f"Bulk mode rendered {len(messages)} of {count}")
+        for label, key, queries in (
+            ("render_to_string", "former", former_queries),
+            ("users.emails", "single", single_queries),
+            ("users.emails bulk", "bulk", bulk_queries),
+        ):
+            self.stdout.write(
+                f"{label}: {count / results[key]:.0f} emails/s, "
+                f"{queries.count} queries"
+            )
+
+    def _former_render(self, signup_code):
+        # The former users.tasks.send_verification_email body
+        frontend_url = getattr(settings, "FRONTEND_URL", "http://localhost:3000")
+        context = {
+            "user": signup_code.user,
+            "verification_url": f"{frontend_url}/verify-email?code={signup_code.code}",
+            "frontend_url": frontend_url,
+            "code": signup_code.code,
+        }
+        subject = render_to_string(
+            "authemail/signup_email_subject.txt", context
+        ).strip()
+        text_content = render_to_string("authemail/signup_email.txt", context)
+        html_content = render_to_string("authemail/signup_email.html", context)
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[signup_code.user.email],
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
@@ -0,0 +1,88 @@
+import os
+import time
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.benchmarks import QueryCounter, create_bench_user, percentile, rolled_back
+from users.views import CustomLogin
+
+
+PASSWORD = "Bench-passw0rd!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure CustomLogin latency (p50/p99) and logins per second per core "
+        "for the configured password hasher. Runs in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=50)
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            help=(
+                "Log in with PASSWORD_PBKDF2_ITERATIONS set to this value; the "
+                "first login re-hashes the stored password"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options["iterations"]:
+            overrides["PASSWORD_PBKDF2_ITERATIONS"] = options["iterations"]
+
+        with rolled_back():
+            user = create_bench_user()
+            user.is_verified = True
+            user.set_password(PASSWORD)
+            user.save(update_fields=["is_verified", "password"])
+            stored_hash = user.password
+
+            with override_settings(**overrides):
+                self._run(user, stored_hash, options["logins"])
+
+    def _run(self, user, stored_hash, count):
+        hasher = get_hasher()
+        cost = getattr(hasher, "iterations", None)
+        self.stdout.write(
+            f"Hasher: {hasher.algorithm}" + (f", {cost} iterations" if cost else "")
+        )
+
+        factory = APIRequestFactory()
+        view = CustomLogin.as_view(throttle_classes=[])
+        samples = []
+        failed = 0
+        with QueryCounter() as queries:
+            cpu_start = time.process_time()
+            for _ in range(count):
+                request = factory.post(
+                    "/api/accounts/login/",
+                    {"email": user.email, "password": PASSWORD},
+                    format="json",
+                )
+                start = time.perf_counter()
+                response = view(request)
+                samples.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    failed += 1
+            cpu_seconds = time.process_time() - cpu_start
+
+        user.refresh_from_db(fields=["password"])
+        self.stdout.write(
+            f"p50 {percentile(samples, 50) * 1000:.1f}ms, "
+            f"p99 {percentile(samples, 99) * 1000:.1f}ms, "
+            f"{queries.count / count:.1f} queries per login"
+        )
+        # Hashing is CPU-bound, so one core sustains count / CPU seconds.
+        self.stdout.write(
+            f"{count / cpu_seconds:.1f} logins/s per core "
+            f"({os.cpu_count()} cores available)"
+        )
+        if user.password != stored_hash:
+            self.stdout.write("Stored password hash was upgraded on first login")
+        if failed:
+            self.stderr.write(f"{failed} logins failed")
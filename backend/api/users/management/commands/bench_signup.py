@@ -0,0 +1,103 @@
+from uuid import uuid4
+
+from authemail.models import SignupCode
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.benchmarks import QueryCounter, rolled_back, timer
+from users.views import CustomSignup
+
+
+PASSWORD = "Bench-passw0rd!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure signups per second through CustomSignup against the configured "
+        "database, next to the former check-then-insert sequence, with the "
+        "statements each runs. The three lookups go away, but the signup "
+        "transaction adds two statements (a savepoint pair here, BEGIN and "
+        "COMMIT outside a transaction), so round trips stay at five. Runs in a "
+        "rolled back transaction, so no verification email is sent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--signups", type=int, default=200)
+        parser.add_argument(
+            "--fast-hasher",
+            action="store_true",
+            help="Hash passwords with MD5 to measure the database path alone",
+        )
+
+    def handle(self, *args, **options):
+        hashers = None
+        if options["fast_hasher"]:
+            hashers = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+        with override_settings(**({"PASSWORD_HASHERS": hashers} if hashers else {})):
+            self._run(options["signups"])
+
+    def _run(self, count):
+        self.stdout.write(f"Database: {connection.vendor}")
+        factory = APIRequestFactory()
+        view = CustomSignup.as_view(throttle_classes=[])
+        User = get_user_model()
+        results = {}
+
+        with rolled_back():
+            with QueryCounter() as former_queries:
+                with timer(results, "former"):
+                    for _ in range(count):
+                        email, username = self._identity()
+                        # The queries the former validator and view ran
+                        User.objects.filter(username=username).exists()
+                        User.objects.filter(email=email).exists()
+                        User.objects.filter(email=email).first()
+                        user = User.objects.create_user(
+                            email=email, username=username, password=PASSWORD
+                        )
+                        SignupCode.objects.create_signup_code(user, "127.0.0.1")
+
+            failed = 0
+            with QueryCounter() as view_queries:
+                with timer(results, "view"):
+                    for _ in range(count):
+                        email, username = self._identity()
+                        request = factory.post(
+                            "/api/accounts/signup/",
+                            {"email": email, "username": username, "password": PASSWORD},
+                            format="json",
+                        )
+                        if view(request).status_code != 201:
+                            failed += 1
+
+            email, username = self._identity()
+            User.objects.create_user(email=email, username=username, password=None)
+            request = factory.post(
+                "/api/accounts/signup/",
+                {"email": email, "username": username, "password": PASSWORD},
+                format="json",
+            )
+            duplicate = view(request)
+
+        for label, key, queries in (
+            ("Former", "former", former_queries),
+            ("CustomSignup", "view", view_queries),
+        ):
+            kinds = ", ".join(
+                f"{queries.kinds[kind] / count:.1f} {kind}"
+                for kind in ("reads", "writes", "transaction")
+            )
+            self.stdout.write(
+                f"{label}: {count / results[key]:.1f} signups/s, "
+                f"{queries.count / count:.1f} queries per signup ({kinds})"
+            )
+        if failed:
+            self.stderr.write(f"{failed} signups failed")
+        self.stdout.write(f"Duplicate signup: {duplicate.status_code} {duplicate.data}")
+
+    def _identity(self):
+        suffix = uuid4().hex[:12]
+        return f"bench_{suffix}@example.com", f"bench_{suffix}"
@@ -0,0 +1,48 @@
+from authemail.models import SignupCode
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django_celery_results.models import TaskResult
+
+from api.benchmarks import create_bench_user, rolled_back
+from api.task_metrics import get_task_write_stats, reset_task_write_stats
+from users.tasks import send_verification_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the database writes caused by running the verification email "
+        "task eagerly, with its result stored and ignored. Runs in a rolled "
+        "back transaction with the locmem email backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=100)
+
+    def handle(self, *args, **options):
+        count = options["tasks"]
+        task = send_verification_email
+        self.stdout.write(f"Result backend: {task.backend.__class__.__name__}")
+
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+        ), rolled_back():
+            user = create_bench_user()
+            code = SignupCode.objects.create_signup_code(user, "127.0.0.1").code
+
+            for label, ignore_result in (("Result stored", False), ("Ignored", True)):
+                before = TaskResult.objects.count()
+                reset_task_write_stats()
+                task.ignore_result = ignore_result
+                task.store_eager_result = not ignore_result
+                try:
+                    for _ in range(count):
+                        task.apply((user.id, code))
+                finally:
+                    del task.ignore_result, task.store_eager_result
+
+                runs, writes = get_task_write_stats()[task.name]
+                self.stdout.write(
+                    f"{label}: {writes / runs:.1f} writes per task, "
+                    f"{TaskResult.objects.count() - before} result rows"
+                )
+            reset_task_write_stats()
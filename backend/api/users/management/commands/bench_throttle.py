@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework import throttling
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import throttling as sliding
+from api.benchmarks import percentile
+from api.kvstore import get_store, is_shared
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of DRF's timestamp-list throttle and "
+        "of the sliding-window throttle, for one client at a high limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        store = "shared Redis" if is_shared(get_store()) else "process-local store"
+        self.stdout.write(f"Sliding window counters in the {store}")
+        request = Request(
+            APIRequestFactory().get("/", REMOTE_ADDR=f"10.{time.time_ns() % 250}.0.1")
+        )
+
+        for label, base in (
+            ("DRF AnonRateThrottle", throttling.AnonRateThrottle),
+            ("Sliding window", sliding.AnonRateThrottle),
+        ):
+            # A limit high enough that every request is allowed, so the list
+            # kept by DRF grows as it would under real traffic.
+            throttle_class = type("BenchThrottle", (base,), {"rate": f"{count}/day"})
+            samples = []
+            denied = 0
+            for _ in range(count):
+                start = time.perf_counter()
+                allowed = throttle_class().allow_request(request, None)
+                samples.append(time.perf_counter() - start)
+                denied += not allowed
+            self.stdout.write(
+                f"{label}: mean {sum(samples) / count * 1e6:.1f}us, "
+                f"p99 {percentile(samples, 99) * 1e6:.1f}us, "
+                f"last {samples[-1] * 1e6:.1f}us"
+                + (f", {denied} denied" if denied else "")
+            )
@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt import serializers
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from api.benchmarks import QueryCounter, create_bench_user, percentile, rolled_back
+from users.tokens import TokenRefreshSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare refresh-token rotation through simplejwt's blacklist tables "
+        "with the key-value store blacklist, with the tables pre-filled. Runs "
+        "in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--refreshes", type=int, default=200)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = create_bench_user()
+            self._fill_tables(user, options["rows"])
+
+            for label, serializer_class in (
+                ("Blacklist tables", serializers.TokenRefreshSerializer),
+                ("Key-value store", TokenRefreshSerializer),
+            ):
+                token_class = serializer_class.token_class
+                refresh = str(token_class.for_user(user))
+                samples = []
+                with QueryCounter() as queries:
+                    for _ in range(options["refreshes"]):
+                        start = time.perf_counter()
+                        serializer = serializer_class(data={"refresh": refresh})
+                        serializer.is_valid(raise_exception=True)
+                        refresh = serializer.validated_data["refresh"]
+                        samples.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"{label}: p50 {percentile(samples, 50) * 1000:.2f}ms, "
+                    f"p99 {percentile(samples, 99) * 1000:.2f}ms, "
+                    f"{queries.count / options['refreshes']:.1f} queries per refresh"
+                )
+
+    def _fill_tables(self, user, count):
+        now = timezone.now()
+        outstanding = OutstandingToken.objects.bulk_create(
+            (
+                OutstandingToken(
+                    user=user,
+                    jti=uuid4().hex,
+                    token="",
+                    created_at=now,
+                    expires_at=now + timedelta(days=1),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+        BlacklistedToken.objects.bulk_create(
+            (BlacklistedToken(token=token) for token in outstanding), batch_size=5000
+        )
+        self.stdout.write(f"Filled the blacklist tables with {count} tokens")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users.codes import PURGE_BATCH_SIZE, purge_codes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired password reset codes and signup codes of verified "
+        "users. Runs daily as the purge-auth-codes beat task."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = purge_codes(options["batch_size"])
+        for label, count in deleted.items():
+            self.stdout.write(f"{label}: {count} rows deleted")
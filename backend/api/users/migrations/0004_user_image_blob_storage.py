@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-17 17:40
+
+import blobs.storage
+import users.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='national_id_back',
+            field=models.ImageField(blank=True, null=True, storage=blobs.storage.get_media_storage, upload_to='national_id_back_images/', validators=[users.validators.validate_image_file]),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='national_id_front',
+            field=models.ImageField(blank=True, null=True, storage=blobs.storage.get_media_storage, upload_to='national_id_front_images/', validators=[users.validators.validate_image_file]),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=blobs.storage.get_media_storage, upload_to='profile_pictures/', validators=[users.validators.validate_image_file]),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2 on 2026-10-17 18:18
+
+import os
+
+import users.storage
+import users.validators
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations, models
+from django.db.models import F
+
+
+SCAN_FIELDS = ["national_id_front", "national_id_back"]
+
+
+def move_scans_to_private_storage(apps, schema_editor):
+    """
+    Copy existing scans out of the public media tree. Blobs may be shared
+    with other rows, so only their reference is released and the garbage
+    collector removes them; older files are deleted here.
+    """
+    User = apps.get_model("users", "User")
+    MediaBlob = apps.get_model("blobs", "MediaBlob")
+    public = FileSystemStorage()
+    private = users.storage.PrivateStorage()
+
+    for field_name in SCAN_FIELDS:
+        upload_to = User._meta.get_field(field_name).upload_to
+        users_with_scans = (
+            User.objects.exclude(**{field_name: ""})
+            .exclude(**{f"{field_name}__isnull": True})
+            .only("pk", field_name)
+        )
+        for user in users_with_scans.iterator():
+            name = getattr(user, field_name).name
+            if not public.exists(name):
+                continue
+            with public.open(name) as content:
+                new_name = private.save(
+                    os.path.join(upload_to, os.path.basename(name)), content
+                )
+            User.objects.filter(pk=user.pk).update(**{field_name: new_name})
+            if name.startswith("blobs/"):
+                MediaBlob.objects.filter(name=name).update(
+                    ref_count=F("ref_count") - 1
+                )
+            else:
+                public.delete(name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blobs', '0001_initial'),
+        ('users', '0006_auth_code_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='national_id_back',
+            field=models.ImageField(blank=True, null=True, storage=users.storage.get_private_storage, upload_to='national_id_back_images/', validators=[users.validators.validate_image_file]),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='national_id_front',
+            field=models.ImageField(blank=True, null=True, storage=users.storage.get_private_storage, upload_to='national_id_front_images/', validators=[users.validators.validate_image_file]),
+        ),
+        migrations.RunPython(
+            move_scans_to_private_storage, migrations.RunPython.noop
+        ),
+    ]
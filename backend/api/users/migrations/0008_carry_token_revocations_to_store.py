@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.utils import timezone
+
+from users.tokens import revoke_jti
+
+
+def carry_revocations_to_store(apps, schema_editor):
+    """
+    Copy unexpired revocations from simplejwt's blacklist into the key-value
+    store, which is all ``users.tokens.RefreshToken`` checks, so tokens
+    revoked before the switch stay revoked.
+    """
+    BlacklistedToken = apps.get_model("token_blacklist", "BlacklistedToken")
+    revoked = BlacklistedToken.objects.filter(
+        token__expires_at__gt=timezone.now()
+    ).values_list("token__jti", "token__expires_at")
+    for jti, expires_at in revoked.iterator(chunk_size=1000):
+        revoke_jti(jti, expires_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+        ('users', '0007_national_id_private_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            carry_revocations_to_store, migrations.RunPython.noop
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from authemail.models import EmailUserManager, EmailAbstractUser
 from uuid import uuid4
+from blobs.storage import get_media_storage
+from .storage import get_private_storage
+from .constants import *
 from .validators import *
 
 
@@ -24,6 +29,7 @@ class User(EmailAbstractUser):
     )
     profile_picture = models.ImageField(
         upload_to="profile_pictures/",
+        storage=get_media_storage,
         null=True,
         blank=True,
         validators=[validate_image_file],
@@ -40,12 +46,14 @@ class User(EmailAbstractUser):
     )
     national_id_front = models.ImageField(
         upload_to="national_id_front_images/",
+        storage=get_private_storage,
         null=True,
         blank=True,
         validators=[validate_image_file],
     )
     national_id_back = models.ImageField(
         upload_to="national_id_back_images/",
+        storage=get_private_storage,
         null=True,
         blank=True,
         validators=[validate_image_file],
@@ -57,6 +65,10 @@ class User(EmailAbstractUser):
     average_rating = models.DecimalField(
         max_digits=3, decimal_places=2, null=True, blank=True
     )
+    # Running totals over all ratings of the user's products, maintained by
+    # advertisements.ratings.ingest_ratings
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    rating_count = models.PositiveIntegerField(default=0)
 
     objects = EmailUserManager()
 
@@ -64,3 +76,41 @@ class User(EmailAbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class EmailOutbox(models.Model):
+    """
+    A transactional email waiting to be sent.
+
+    Rows are written in the same transaction as the code they refer to and
+    sent by ``users.outbox.dispatch``. Sent rows are deleted; rows that keep
+    failing are marked ``failed`` and kept for inspection.
+    """
+
+    kind = models.CharField(max_length=20, choices=EMAIL_KIND_CHOICES)
+    code = models.CharField(
+        max_length=40, help_text=_("SignupCode or PasswordResetCode key")
+    )
+    status = models.CharField(
+        max_length=10, choices=OUTBOX_STATUS_CHOICES, default="pending"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(
+        default=timezone.now, help_text=_("Not sent before this time")
+    )
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=models.Q(status="pending"),
+                name="email_outbox_pending_idx",
+            ),
+        ]
+        verbose_name = _("Email Outbox")
+        verbose_name_plural = _("Email Outbox")
+
+    def __str__(self):
+        return f"{self.kind} email for {self.code} ({self.status})"
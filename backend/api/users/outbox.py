@@ -0,0 +1,180 @@
+"""
+Transactional outbox for the emails in ``users.emails``.
+
+``queue_email`` writes an ``EmailOutbox`` row in the caller's transaction,
+so an email exists exactly when the code it carries was committed, and a
+request never waits for the Celery broker. ``dispatch`` runs from the
+``dispatch_email_outbox`` beat task. It leases due rows in batches: a short
+``SELECT ... FOR UPDATE SKIP LOCKED`` transaction pushes their
+``available_at`` past ``LEASE``, so several workers can dispatch at once
+without taking the same rows. The leased emails are then rendered in bulk and
+sent over the worker's pooled connection (``users.mail``) with no
+transaction or row lock held. Rows of a worker that dies mid-batch become
+due again when the lease runs out.
+
+Every delivery is claimed in ``api.idempotency`` right before it is sent,
+keyed on the email kind and code, so an email is sent once however many rows,
+retries or task calls ask for it. A row whose email is already sent is
+deleted; one whose claim is still held elsewhere stays pending. The claim's
+lock expires before the lease, so a row released by a dead worker can be
+claimed again.
+"""
+
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.idempotency import DEFAULT_TTL, claim, is_done
+
+from .emails import build_password_reset_emails, build_signup_emails
+from .mail import CONNECTION_ERRORS, send, wait_for_send_slot
+from .models import EmailOutbox
+import logging
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+
+DISPATCH_BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+CONNECTION_RETRY_DELAY = timedelta(minutes=1)
+# Longer than sending a whole batch at the provider's rate limit
+LEASE = timedelta(minutes=5)
+# Covers one send; shorter than LEASE so a dead worker's rows can be retried
+CLAIM_LOCK_TTL = timedelta(minutes=2)
+RENDERERS = {
+    "signup": build_signup_emails,
+    "password_reset": build_password_reset_emails,
+}
+
+
+def queue_email(kind, code):
+    return EmailOutbox.objects.create(kind=kind, code=code)
+
+
+def claim_email(kind, code):
+    """
+    Claim the one delivery of the ``kind`` email for ``code``. Shared by the
+    dispatcher and the email tasks, so neither sends what the other sent.
+    """
+    ttl = getattr(settings, "EMAIL_IDEMPOTENCY_TTL", DEFAULT_TTL)
+    return claim(
+        f"users.email:{kind}",
+        code,
+        ttl=ttl,
+        lock_ttl=int(CLAIM_LOCK_TTL.total_seconds()),
+    )
+
+
+def email_sent(kind, code):
+    return is_done(f"users.email:{kind}", code)
+
+
+def retry_delay(attempts):
+    return timedelta(minutes=2**attempts)
+
+
+def _render(rows):
+    messages = {}
+    for kind, render in RENDERERS.items():
+        codes = [row.code for row in rows if row.kind == kind]
+        if codes:
+            rendered = render(codes)
+            messages.update(
+                ((kind, code), message) for code, message in rendered.items()
+            )
+    return messages
+
+
+def _fail(row, error, now):
+    row.attempts += 1
+    row.last_error = str(error)
+    if row.attempts >= MAX_ATTEMPTS:
+        row.status = "failed"
+        logger.error(f"Giving up on {row}: {error}")
+    else:
+        row.available_at = now + retry_delay(row.attempts)
+    row.save(update_fields=["attempts", "last_error", "status", "available_at"])
+
+
+def lease_batch(batch_size, now):
+    """Lease up to ``batch_size`` due rows to this worker and return them."""
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", available_at__lte=now)
+            .order_by("available_at", "id")[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+            available_at=now + LEASE
+        )
+    return rows
+
+
+def dispatch_batch(batch_size=DISPATCH_BATCH_SIZE):
+    """
+    Lease and send one batch of due emails.
+
+    Returns ``(leased, sent)``.
+    """
+    now = timezone.now()
+    rows = lease_batch(batch_size, now)
+    if not rows:
+        return 0, 0
+
+    messages = _render(rows)
+    done = []
+    try:
+        for index, row in enumerate(rows):
+            message = messages.get((row.kind, row.code))
+            if message is None:
+                # The code was used or deleted before the email went out.
+                done.append(row.pk)
+                continue
+            email_claim = claim_email(row.kind, row.code)
+            if email_claim is None:
+                # Sent already (by a run that died before deleting the row,
+                # or by a task): remove the row. Still running elsewhere:
+                # leave it leased, to be looked at again.
+                if email_sent(row.kind, row.code):
+                    done.append(row.pk)
+                continue
+            wait_for_send_slot()
+            try:
+                send(message)
+            except CONNECTION_ERRORS as e:
+                # Not the message's fault: retry this and the rest of the
+                # batch on a later run without counting an attempt.
+                logger.warning(f"Email connection failed, deferring dispatch: {e}")
+                email_claim.release()
+                EmailOutbox.objects.filter(
+                    pk__in=[pending.pk for pending in rows[index:]]
+                ).update(
+                    available_at=now + CONNECTION_RETRY_DELAY, last_error=str(e)
+                )
+                break
+            except smtplib.SMTPException as e:
+                email_claim.release()
+                _fail(row, e, now)
+            else:
+                email_claim.complete()
+                done.append(row.pk)
+    finally:
+        EmailOutbox.objects.filter(pk__in=done).delete()
+    return len(rows), len(done)
+
+
+def dispatch(batch_size=DISPATCH_BATCH_SIZE):
+    """
+    Send due emails batch by batch until none are left or the mail server
+    stops accepting them. Returns the number of rows completed.
+    """
+    completed = 0
+    while True:
+        leased, sent = dispatch_batch(batch_size)
+        completed += sent
+        if leased < batch_size or sent == 0:
+            return completed
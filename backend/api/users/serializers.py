@@ -68,6 +68,11 @@ class ProfileCompletionSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "profile_completed",
         ]
+        # The scans are kept in private storage and have no URL
+        extra_kwargs = {
+            "national_id_front": {"write_only": True},
+            "national_id_back": {"write_only": True},
+        }
 
     def validate(self, data):
         return validate_profile_completion_data(data)
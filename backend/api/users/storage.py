@@ -0,0 +1,29 @@
+"""
+Private storage for identity documents.
+
+National ID scans are personal data, so they are kept out of the public
+media tree (and out of ``blobs.storage``, whose files are served with
+``Cache-Control: public, immutable``). They are written under
+``PRIVATE_MEDIA_ROOT``, which the web server must not serve, and have no URL.
+"""
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class PrivateStorage(FileSystemStorage):
+    def __init__(self, **kwargs):
+        kwargs.setdefault("location", settings.PRIVATE_MEDIA_ROOT)
+        super().__init__(**kwargs)
+
+    def url(self, name):
+        raise ValueError("Files in private storage have no URL.")
+
+
+private_storage = PrivateStorage()
+
+
+def get_private_storage():
+    return private_storage
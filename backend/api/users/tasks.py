@@ -1,9 +1,15 @@
 from celery import shared_task
 from authemail.models import SignupCode, PasswordResetCode
-from django.core.mail import send_mail
-from django.conf import settings
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from .emails import password_reset_email, signup_email
+from .mail import drain, enqueue
+from . import outbox
+from .codes import PURGE_BATCH_SIZE, purge_codes
+from .tokens import revoke_jti
 import logging
 import traceback
 
@@ -11,6 +17,12 @@ import traceback
 logger = logging.getLogger(__name__)
 
 
+# send_verification_email, send_password_reset_email and drain_email_queue
+# are no longer enqueued: new emails go through users.outbox. They are kept
+# only to finish the tasks and queued messages of the previous release.
+# Remove them, and the drain-email-queue beat entry, after 2026-11-17.
+
+
 @shared_task
 def send_verification_email(user_id, code):
     """
@@ -24,6 +36,7 @@ def send_verification_email(user_id, code):
         f"TASK RECEIVED: Attempting to send verification email for user_id={user_id}, code={code}"
     )
 
+    email_claim = None
     try:
         if not code or not user_id:
             logger.warning(
@@ -31,51 +44,38 @@ def send_verification_email(user_id, code):
             )
             return
 
+        email_claim = outbox.claim_email("signup", code)
+        if email_claim is None:
+            logger.info(f"Verification email for code={code} already sent")
+            return
+
         logger.info(f"Looking up SignupCode with code={code}")
-        signup_code = SignupCode.objects.get(code=code)
+        signup_code = SignupCode.objects.select_related("user").get(code=code)
 
         # Verify that the signup code belongs to the correct user
         if str(signup_code.user.id) != str(user_id):
             logger.warning(
                 f"User ID mismatch for code: {code}. Expected {user_id}, got {signup_code.user.id}"
             )
+            email_claim.release()
             return
 
-        # Build verification URLs - these can be configured in settings
-        frontend_url = getattr(settings, "FRONTEND_URL", "http://localhost:3000")
-        verification_url = f"{frontend_url}/verify-email?code={code}"
-
-        # Prepare context for templates
-        context = {
-            "user": signup_code.user,
-            "verification_url": verification_url,
-            "frontend_url": frontend_url,
-            "code": code,
-        }
-
-        # Render email content from templates
-        subject = render_to_string(
-            "authemail/signup_email_subject.txt", context
-        ).strip()
-        text_content = render_to_string("authemail/signup_email.txt", context)
-        html_content = render_to_string("authemail/signup_email.html", context)
-
-        # Create email message
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[signup_code.user.email],
-        )
-        email.attach_alternative(html_content, "text/html")
+        email = signup_email(signup_code)
 
-        # Send email
-        email.send(fail_silently=False)
+        # Queue the email and send whatever is queued over the worker's
+        # connection. Once queued, the email goes out even if this drain
+        # fails, so the claim is complete.
+        enqueue(email)
+        email_claim.complete()
+        drain()
         logger.info(f"SUCCESS: Verification email sent to {signup_code.user.email}")
 
     except SignupCode.DoesNotExist:
         logger.error(f"Signup code not found for code: {code}")
+        email_claim.release()
     except Exception as e:
+        if email_claim is not None:
+            email_claim.release()
         logger.error(f"Error sending verification email: {str(e)}")
         logger.error(traceback.format_exc())
         print(f"ERROR: Failed to send verification email. Error: {str(e)}")
@@ -93,51 +93,109 @@ def send_password_reset_email(code):
         f"TASK RECEIVED: Attempting to send password reset email for code={code}"
     )
 
+    email_claim = None
     try:
         if not code:
             logger.warning("Missing required parameter: code")
             return
 
+        email_claim = outbox.claim_email("password_reset", code)
+        if email_claim is None:
+            logger.info(f"Password reset email for code={code} already sent")
+            return
+
         logger.info(f"Looking up PasswordResetCode with code={code}")
-        password_reset_code = PasswordResetCode.objects.get(code=code)
-
-        # Build reset URL - this can be configured in settings
-        frontend_url = getattr(settings, "FRONTEND_URL", "http://localhost:3000")
-        reset_url = f"{frontend_url}/reset-password?code={code}"
-
-        # Prepare context for templates
-        context = {
-            "user": password_reset_code.user,
-            "reset_url": reset_url,
-            "frontend_url": frontend_url,
-            "code": code,
-        }
-
-        # Render email content from templates
-        subject = render_to_string(
-            "authemail/password_reset_email_subject.txt", context
-        ).strip()
-        text_content = render_to_string("authemail/password_reset_email.txt", context)
-        html_content = render_to_string("authemail/password_reset_email.html", context)
-
-        # Create email message
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[password_reset_code.user.email],
+        password_reset_code = PasswordResetCode.objects.select_related("user").get(
+            code=code
         )
-        email.attach_alternative(html_content, "text/html")
 
-        # Send email
-        email.send(fail_silently=False)
+        email = password_reset_email(password_reset_code)
+
+        # Queue the email and send whatever is queued over the worker's
+        # connection. Once queued, the email goes out even if this drain
+        # fails, so the claim is complete.
+        enqueue(email)
+        email_claim.complete()
+        drain()
         logger.info(
             f"SUCCESS: Password reset email sent to {password_reset_code.user.email}"
         )
 
     except PasswordResetCode.DoesNotExist:
         logger.error(f"Password reset code not found for code: {code}")
+        email_claim.release()
     except Exception as e:
+        if email_claim is not None:
+            email_claim.release()
         logger.error(f"Error sending password reset email: {str(e)}")
         logger.error(traceback.format_exc())
         print(f"ERROR: Failed to send password reset email. Error: {str(e)}")
+
+
+@shared_task
+def dispatch_email_outbox():
+    """Send the transactional emails waiting in the outbox."""
+    return outbox.dispatch()
+
+
+@shared_task
+def drain_email_queue():
+    """
+    Send emails left in the queue by the previous release. Retained until
+    2026-11-17 (see above).
+    """
+    return drain()
+
+
+@shared_task
+def prune_token_blacklist(batch_size=1000):
+    """
+    Empty the simplejwt blacklist tables, which are no longer written.
+
+    Revocations of tokens that have not expired yet are copied to the
+    key-value store first (see users.tokens); expired rows are deleted in
+    batches.
+
+    Args:
+        batch_size: Number of rows handled per query
+    """
+    now = timezone.now()
+    revoked = BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list(
+        "token__jti", "token__expires_at"
+    )
+    carried = 0
+    for jti, expires_at in revoked.iterator(chunk_size=batch_size):
+        revoke_jti(jti, expires_at)
+        carried += 1
+
+    expired = OutstandingToken.objects.filter(expires_at__lte=now)
+    deleted = 0
+    while True:
+        pks = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        # BlacklistedToken rows go with their OutstandingToken (CASCADE).
+        deleted += OutstandingToken.objects.filter(pk__in=pks).delete()[1].get(
+            OutstandingToken._meta.label, 0
+        )
+
+    logger.info(
+        f"Pruned {deleted} expired tokens, carried {carried} revocations to the store"
+    )
+    return deleted
+
+
+@shared_task
+def purge_auth_codes(batch_size=PURGE_BATCH_SIZE):
+    """
+    Delete expired password reset codes and signup codes of users who are
+    already verified (see users.codes).
+
+    Args:
+        batch_size: Number of rows deleted per query
+    """
+    deleted = purge_codes(batch_size)
+    logger.info(
+        ", ".join(f"Purged {count} {label} rows" for label, count in deleted.items())
+    )
+    return deleted
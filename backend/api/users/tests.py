@@ -1,3 +1,200 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from authemail.models import PasswordResetCode, SignupCode
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from advertisements.ratings import ingest_ratings
+from api.benchmarks import create_bench_product, create_bench_user
+
+from . import outbox
+from .authentication import load_user
+from .codes import purge_codes
+from .models import EmailOutbox, User
+from .tokens import RefreshToken
+
+
+class PurgeCodesTests(TestCase):
+    def age(self, code, days):
+        type(code).objects.filter(pk=code.pk).update(
+            created_at=timezone.now() - timedelta(days=days)
+        )
+
+    def test_unverified_users_keep_their_signup_code(self):
+        code = SignupCode.objects.create_signup_code(create_bench_user(), "127.0.0.1")
+        self.age(code, 365)
+        purge_codes()
+        self.assertTrue(SignupCode.objects.filter(pk=code.pk).exists())
+
+    def test_signup_codes_of_verified_users_are_deleted(self):
+        user = create_bench_user()
+        code = SignupCode.objects.create_signup_code(user, "127.0.0.1")
+        user.is_verified = True
+        user.save()
+        purge_codes()
+        self.assertFalse(SignupCode.objects.filter(pk=code.pk).exists())
+
+    def test_password_reset_codes_expire_after_authemails_period(self):
+        user = create_bench_user()
+        usable = PasswordResetCode.objects.create_password_reset_code(user)
+        self.age(usable, 3)
+        expired = PasswordResetCode.objects.create(user=user, code="expired")
+        self.age(expired, 5)
+        purge_codes()
+        self.assertTrue(PasswordResetCode.objects.filter(pk=usable.pk).exists())
+        self.assertFalse(PasswordResetCode.objects.filter(pk=expired.pk).exists())
+
+
+class OutboxDispatchTests(TransactionTestCase):
+    def queue_signup_email(self):
+        user = create_bench_user()
+        code = SignupCode.objects.create_signup_code(user, "127.0.0.1")
+        outbox.queue_email("signup", code.code)
+        return code
+
+    def test_sends_outside_a_transaction(self):
+        self.queue_signup_email()
+        in_transaction = []
+        send = outbox.send
+
+        def record(message):
+            in_transaction.append(connection.in_atomic_block)
+            return send(message)
+
+        with mock.patch.object(outbox, "send", record):
+            self.assertEqual(outbox.dispatch_batch(), (1, 1))
+        self.assertEqual(in_transaction, [False])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_leased_rows_are_not_dispatched_twice(self):
+        self.queue_signup_email()
+        now = timezone.now()
+        leased = outbox.lease_batch(10, now)
+        self.assertEqual(len(leased), 1)
+        self.assertEqual(outbox.lease_batch(10, now), [])
+        self.assertEqual(outbox.dispatch_batch(), (0, 0))
+        self.assertEqual(len(outbox.lease_batch(10, now + outbox.LEASE)), 1)
+
+    def test_rows_claimed_elsewhere_stay_pending(self):
+        code = self.queue_signup_email()
+        other_run = outbox.claim_email("signup", code.code)
+
+        self.assertEqual(outbox.dispatch_batch(), (1, 0))
+        self.assertTrue(EmailOutbox.objects.filter(status="pending").exists())
+        self.assertEqual(len(mail.outbox), 0)
+
+        other_run.complete()
+        EmailOutbox.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch_batch(), (1, 1))
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_rows_left_by_a_crashed_batch_are_sent_after_the_lease(self):
+        for _ in range(3):
+            self.queue_signup_email()
+        send = outbox.send
+
+        def crash_on_second(message):
+            if len(mail.outbox) == 1:
+                raise RuntimeError("worker died")
+            return send(message)
+
+        with mock.patch.object(outbox, "send", crash_on_second):
+            with self.assertRaises(RuntimeError):
+                outbox.dispatch_batch()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+        # Once the lease runs out, the crashed run's claim has expired too
+        after_lease = time.monotonic() + outbox.LEASE.total_seconds()
+        EmailOutbox.objects.update(available_at=timezone.now())
+        with mock.patch("api.kvstore.time.monotonic", return_value=after_lease):
+            self.assertEqual(outbox.dispatch_batch(), (2, 2))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class ProfileUpdateTests(TestCase):
+    def setUp(self):
+        self.user = create_bench_user()
+        self.client = APIClient()
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_profile_patch_keeps_ratings_ingested_since_the_user_was_cached(self):
+        load_user(self.user.pk)
+        ingest_ratings([(create_bench_product(owner=self.user).pk, 5)])
+
+        response = self.client.patch(
+            reverse("profile"), {"bio": "Hello"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.bio, "Hello")
+        self.assertEqual((user.rating_count, user.average_rating), (1, 5))
+
+
+class PasswordResetTests(TestCase):
+    def setUp(self):
+        self.user = create_bench_user()
+        self.user.is_verified = True
+        self.user.save()
+
+    def request_reset(self):
+        return APIClient().post(
+            reverse("password_reset"), {"email": self.user.email}, format="json"
+        )
+
+    def test_the_code_and_its_email_are_queued_together(self):
+        old = PasswordResetCode.objects.create_password_reset_code(self.user)
+
+        self.assertEqual(self.request_reset().status_code, 201)
+
+        code = PasswordResetCode.objects.get(user=self.user)
+        self.assertNotEqual(code.pk, old.pk)
+        self.assertTrue(
+            EmailOutbox.objects.filter(kind="password_reset", code=code.code).exists()
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_no_code_is_kept_when_queueing_fails(self):
+        with mock.patch("users.views.queue_email", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.request_reset()
+        self.assertFalse(PasswordResetCode.objects.exists())
+
+    def test_unverified_users_get_no_code(self):
+        self.user.is_verified = False
+        self.user.save()
+        self.assertEqual(self.request_reset().status_code, 400)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class SignupConflictTests(TestCase):
+    def setUp(self):
+        self.existing = create_bench_user()
+
+    def sign_up(self, email, username):
+        return APIClient().post(
+            reverse("signup"),
+            {"email": email, "username": username, "password": "Bench-passw0rd!"},
+            format="json",
+        )
+
+    def test_every_taken_field_is_reported(self):
+        response = self.sign_up(self.existing.email, self.existing.username)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"email", "username"})
+
+    def test_only_the_taken_field_is_reported(self):
+        response = self.sign_up("new_user@example.com", self.existing.username)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"username"})
+        self.assertEqual(User.objects.filter(email="new_user@example.com").count(), 0)
@@ -0,0 +1,120 @@
+"""
+Refresh tokens revoked through the shared key-value store.
+
+simplejwt's blacklist app records every issued refresh token in
+``OutstandingToken`` and checks ``BlacklistedToken`` with a join on every
+refresh, so refresh latency grows with the tables. Here a revoked JTI is a
+single key in ``api.kvstore`` that expires with the token itself. Checking
+it is one ``EXISTS``, and nothing is written when a token is issued.
+
+Tokens also carry a few user fields as claims (``USER_CLAIMS``), so that
+``users.authentication.ClaimsJWTAuthentication`` can authenticate a request
+without loading the user. They are written at login and refreshed from the
+database on every refresh.
+
+Revocations already in the old tables were copied to the store by migration
+``users.0008``. After that the tables are only read by
+``users.tasks.prune_token_blacklist``, which carries over any revocation
+still valid and deletes expired rows.
+"""
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers, tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from api.kvstore import get_store
+
+
+USER_CLAIMS = ("is_trusted", "profile_completed", "is_staff")
+
+
+def revoked_key(jti):
+    return f"auth:revoked_jti:{jti}"
+
+
+def revoke_jti(jti, expires_at):
+    """Revoke ``jti`` until ``expires_at``, when the token expires anyway."""
+    ttl = int((expires_at - timezone.now()).total_seconds())
+    if ttl > 0:
+        get_store().set(revoked_key(jti), 1, ex=ttl)
+
+
+def is_revoked(jti):
+    return bool(get_store().exists(revoked_key(jti)))
+
+
+class RefreshToken(tokens.RefreshToken):
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        revoke_jti(
+            self.payload[api_settings.JTI_CLAIM],
+            datetime_from_epoch(self.payload["exp"]),
+        )
+
+    def outstand(self):
+        return None
+
+    def set_user_claims(self, user):
+        for claim in USER_CLAIMS:
+            self[claim] = getattr(user, claim)
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which records an OutstandingToken.
+        token = super(tokens.BlacklistMixin, cls).for_user(user)
+        token.set_user_claims(user)
+        return token
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    """
+    simplejwt's refresh, rewriting the user claims from the user row it
+    loads anyway, so that they are never older than the access token.
+    """
+
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id:
+            try:
+                user = get_user_model().objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except get_user_model().DoesNotExist:
+                raise AuthenticationFailed(
+                    self.error_messages["no_active_account"], "no_active_account"
+                )
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(
+                    self.error_messages["no_active_account"], "no_active_account"
+                )
+            refresh.set_user_claims(user)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
+        return data
@@ -1,9 +1,11 @@
 from rest_framework.serializers import ValidationError
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 import string
 import re
 from datetime import datetime
 from django.utils.translation import gettext as _
+from api.validators import validate_image_upload
 
 
 def validate_password_strength(password):
@@ -66,47 +68,38 @@ def validate_date_of_birth(date_of_birth):
 
 
 def validate_image_file(image_file):
-    if image_file.content_type not in [
-        "image/jpeg",
-        "image/png",
-        "image/jpg",
-        "image/webp",
-    ]:
-        raise ValidationError(
-            _("Invalid image file. Please upload a valid image file.")
-        )
-    if image_file.size > 10 * 1024 * 1024:
-        raise ValidationError(_("Image file cannot be larger than 10MB."))
+    validate_image_upload(
+        image_file,
+        allowed_formats={"jpeg", "png", "webp"},
+        max_size=10 * 1024 * 1024,
+        size_message=_("Image file cannot be larger than 10MB."),
+        format_message=_("Invalid image file. Please upload a valid image file."),
+    )
     return image_file
 
 
 def validate_signup_data(data):
-    from .models import User
-
+    """
+    Check the format of the signup fields. Uniqueness of the email and
+    username is enforced by the database when the user is created (see
+    ``CustomSignup``), so this runs no queries.
+    """
     errors = {}
 
-    # Check uniqueness
-    if User.objects.filter(username=data.get("username")).exists():
-        errors["username"] = _("Username is already taken.")
+    try:
+        validate_email(data.get("email"))
+    except ValidationError as e:
+        errors["email"] = e.detail
 
-    if User.objects.filter(email=data.get("email")).exists():
-        errors["email"] = _("Email is already registered.")
+    try:
+        validate_username(data.get("username"))
+    except ValidationError as e:
+        errors["username"] = e.detail
 
-        # Validate field formats
-        try:
-            validate_email(data.get("email"))
-        except ValidationError as e:
-            errors["email"] = e.message
-
-        try:
-            validate_username(data.get("username"))
-        except ValidationError as e:
-            errors["username"] = e.message
-
-        try:
-            validate_password(data.get("password"))
-        except ValidationError as e:
-            errors["password"] = e.message
+    try:
+        validate_password(data.get("password"))
+    except DjangoValidationError as e:
+        errors["password"] = e.messages
 
     if errors:
         raise ValidationError(errors)
@@ -114,6 +107,18 @@ def validate_signup_data(data):
     return data
 
 
+def unique_violation_fields(error, fields):
+    """
+    Return the ``fields`` named by the unique constraint that raised the
+    ``IntegrityError`` ``error``.
+    """
+    # psycopg reports the constraint name; SQLite only has the message.
+    diag = getattr(error.__cause__, "diag", None)
+    detail = getattr(diag, "constraint_name", None) or str(error)
+    words = set(re.split(r"[^a-z0-9]+", detail.lower()))
+    return [field for field in fields if field in words]
+
+
 def validate_profile_completion_data(data):
     errors = {}
 
@@ -1,24 +1,49 @@
-from django.contrib.auth import get_user_model
-from authemail.views import Signup, Login, Logout
+from django.contrib.auth import authenticate, get_user_model
+from authemail.views import Signup, Login, Logout, PasswordReset
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import RefreshToken
 from .serializers import (
     CustomSignupSerializer,
     UserProfileSerializer,
     ProfileCompletionSerializer,
 )
-from .models import User
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
-from django.core.cache import cache
-from authemail.models import SignupCode
+from .cache import get_cached_profile
+from authemail.models import PasswordResetCode, SignupCode
+from rest_framework.authtoken.models import Token
 from ipware import get_client_ip
-from .tasks import send_verification_email
+from .outbox import queue_email
+from .validators import unique_violation_fields
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+
+
+SIGNUP_CONFLICT_MESSAGES = {
+    "email": _("Email is already registered."),
+    "username": _("Username is already taken."),
+}
+
+
+def signup_conflict_errors(error, values):
+    fields = unique_violation_fields(error, SIGNUP_CONFLICT_MESSAGES)
+    if not fields:
+        raise error
+    # The database names only the first violated constraint. Conflicts are
+    # rare, so look the other fields up here rather than on every signup.
+    users = get_user_model().objects
+    fields += [
+        field
+        for field in SIGNUP_CONFLICT_MESSAGES
+        if field not in fields and users.filter(**{field: values[field]}).exists()
+    ]
+    return {field: [SIGNUP_CONFLICT_MESSAGES[field]] for field in fields}
 
 
 class CustomSignup(Signup):
     serializer_class = CustomSignupSerializer
+    throttle_scope = "signup"
 
     def post(self, request, format=None):
         serializer = self.serializer_class(data=request.data)
@@ -26,52 +51,118 @@ class CustomSignup(Signup):
             email = serializer.validated_data.get("email")
             username = serializer.validated_data.get("username")
             password = serializer.validated_data.get("password")
-            marketing_consent = serializer.validated_data.get("marketing_consent")
+            marketing_consent = serializer.validated_data.get(
+                "marketing_consent", False
+            )
+
+            ip_address, is_routable = get_client_ip(request)
+            if ip_address is None:
+                ip_address = "0.0.0.0"
 
             try:
-                user = get_user_model().objects.get(email=email)
+                with transaction.atomic():
+                    user = get_user_model().objects.create_user(
+                        email=email,
+                        username=username,
+                        password=password,
+                        marketing_consent=marketing_consent,
+                    )
+                    signup_code = SignupCode.objects.create_signup_code(
+                        user, ip_address
+                    )
+                    queue_email("signup", signup_code.code)
+            except IntegrityError as e:
                 return Response(
-                    {"message": "User with this email already exists"},
+                    signup_conflict_errors(e, {"email": email, "username": username}),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            except get_user_model().DoesNotExist:
-                user = get_user_model().objects.create_user(
-                    email=email,
-                    username=username,
-                    password=password,
-                    marketing_consent=marketing_consent,
-                )
 
-                ip_address = get_client_ip(request)
-                if ip_address is None:
-                    ip_address = "0.0.0.0"
-
-                signup_code = SignupCode.objects.create_signup_code(user, ip_address)
-                send_verification_email.delay(user.id, signup_code.code)
-                return Response(
-                    {
-                        "email": email,
-                        "username": username,
-                        "marketing_consent": marketing_consent,
-                    },
-                    status=status.HTTP_201_CREATED,
-                )
+            return Response(
+                {
+                    "email": email,
+                    "username": username,
+                    "marketing_consent": marketing_consent,
+                },
+                status=status.HTTP_201_CREATED,
+            )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class CustomLogin(Login):
+    """
+    Authenticate once and issue the authemail token and the JWT pair for the
+    same user object. ``authenticate`` also re-hashes the password when the
+    configured hasher or its cost changed.
+    """
+
+    throttle_scope = "login"
+
     def post(self, request, format=None):
-        response = super().post(request, format)
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        if response.status_code == status.HTTP_200_OK:
-            email = request.data.get("email")
-            user = User.objects.get(email=email)
-            refresh = RefreshToken.for_user(user)
-            response.data["refresh"] = str(refresh)
-            response.data["access"] = str(refresh.access_token)
+        user = authenticate(
+            request,
+            email=serializer.validated_data["email"],
+            password=serializer.validated_data["password"],
+        )
+        if user is None:
+            return Response(
+                {"detail": _("Unable to login with provided credentials.")},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        if not user.is_verified:
+            return Response(
+                {"detail": _("User account not verified.")},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        if not user.is_active:
+            return Response(
+                {"detail": _("User account not active.")},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        token, created = Token.objects.get_or_create(user=user)
+        refresh = RefreshToken.for_user(user)
+        return Response(
+            {
+                "token": token.key,
+                "refresh": str(refresh),
+                "access": str(refresh.access_token),
+            },
+            status=status.HTTP_200_OK,
+        )
 
-        return response
+
+class CustomPasswordReset(PasswordReset):
+    throttle_scope = "password_reset"
+
+    def post(self, request, format=None):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        email = serializer.data["email"]
+        user = get_user_model().objects.filter(email=email).first()
+        if user is not None:
+            # The new code and its outbox row are written together
+            with transaction.atomic():
+                # Unused codes are replaced, as in authemail
+                PasswordResetCode.objects.filter(user=user).delete()
+                if user.is_verified and user.is_active:
+                    reset_code = PasswordResetCode.objects.create_password_reset_code(
+                        user
+                    )
+                    queue_email("password_reset", reset_code.code)
+                    return Response({"email": email}, status=status.HTTP_201_CREATED)
+
+        # Since this is AllowAny, don't give away which check failed.
+        return Response(
+            {"detail": _("Password reset not allowed.")},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
 
 class CustomLogout(Logout):
@@ -89,36 +180,36 @@ class CustomLogout(Logout):
         return response
 
 
+def lock_request_user(request):
+    """
+    Reload and lock the request's user for a read-modify-write. ``request.user``
+    may be a cached copy (see ``users.authentication``), and saving it would
+    write its stale fields, such as the rating totals, over the row.
+    """
+    return get_user_model().objects.select_for_update().get(pk=request.user.pk)
+
+
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cache_key = f"user_profile_{request.user.id}"
-        profile_data = cache.get(cache_key)
-
-        if not profile_data:
-            serializer = UserProfileSerializer(request.user)
-            profile_data = serializer.data
-            cache.set(cache_key, profile_data, timeout=60 * 15)
-
-        return Response(profile_data)
+        return Response(get_cached_profile(request.user.id))
 
+    @transaction.atomic
     def patch(self, request):
-        serializer = UserProfileSerializer(
-            request.user, data=request.data, partial=True
-        )
+        user = lock_request_user(request)
+        serializer = UserProfileSerializer(user, data=request.data, partial=True)
 
         if serializer.is_valid():
             allowed_fields = ["phone_number", "profile_picture", "bio", "location"]
             for field in allowed_fields:
                 setattr(
-                    request.user,
+                    user,
                     field,
-                    serializer.validated_data.get(field, getattr(request.user, field)),
+                    serializer.validated_data.get(field, getattr(user, field)),
                 )
 
             serializer.save()
-            cache.delete(f"user_profile_{request.user.id}")
             return Response(serializer.data)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -127,16 +218,16 @@ class UserProfileView(APIView):
 class ProfileCompletionView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @transaction.atomic
     def post(self, request):
         serializer = ProfileCompletionSerializer(
-            instance=request.user,
+            instance=lock_request_user(request),
             data=request.data,
             partial=True,
         )
 
         if serializer.is_valid():
             serializer.save()
-            cache.delete(f"user_profile_{request.user.id}")
             return Response(serializer.data)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)